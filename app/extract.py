@@ -1,8 +1,31 @@
 import pdfplumber
+import os
 import re
 import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import List, Optional, Dict
 
+try:
+    # optional: google-re2 runs these simple patterns in linear time with
+    # lower per-call overhead; fall back to the stdlib engine when absent.
+    import re2 as _re
+except Exception:
+    _re = re
+
+
+# Compiled once at import time; these run per-line (and again inside the
+# reflection scanner) so rebuilding them per call is wasted work. None of
+# the patterns uses backrefs/lookaround, so they are re2-compatible.
+_WEEK_RE = _re.compile(r"第\s*(\d+)\s*周")
+_DAY_RE = _re.compile(r"第\s*([\d、]+)\s*日")
+# the verse marker is a fixed literal prefix, so plain str.find + slicing
+# beats a regex search for it (see the two assembly loops below)
+_VERSE_MARKER = "金句："
+# prompt lines to skip while collecting reflections; one alternation scan
+# replaces the old startswith + three-way substring check per line
+_PROMPT_RE = _re.compile(r"请用|思考|提醒|意义")
+
 
 def _normalize_text(s: str) -> str:
     """Normalize whitespace in extracted text: collapse runs of whitespace (including newlines)
@@ -10,8 +33,9 @@ def _normalize_text(s: str) -> str:
     """
     if not s:
         return ""
-    # replace any run of whitespace (spaces, tabs, newlines) with a single space
-    return re.sub(r"\s+", " ", s).strip()
+    # str.split() with no argument splits on any whitespace run and drops
+    # empty fields, so join+split collapses and strips in one C-level pass
+    return " ".join(s.split())
 
 
 def _detect_day_from_lines(lines: List[str], i: int) -> Optional[Dict]:
@@ -22,12 +46,15 @@ def _detect_day_from_lines(lines: List[str], i: int) -> Optional[Dict]:
     consumed (int) — number of lines consumed (1 or 2). Returns None if no
     day header detected.
     """
-    week_pattern = re.compile(r"第\s*(\d+)\s*周")
-    day_pattern = re.compile(r"第\s*([\d、]+)\s*日")
-
     line = lines[i].strip()
-    week_match = week_pattern.search(line)
-    day_match = day_pattern.search(line)
+    # cheap literal prefilter: every header form needs 第 on this line, and
+    # the substring test is far cheaper than starting the regex engine —
+    # this skips both searches for the vast majority of body lines
+    if "第" not in line:
+        return None
+
+    week_match = _WEEK_RE.search(line)
+    day_match = _DAY_RE.search(line)
 
     # Case A: both week and day on the same line
     if week_match and day_match:
@@ -50,7 +77,7 @@ def _detect_day_from_lines(lines: List[str], i: int) -> Optional[Dict]:
     # Case B: week on this line, day on next line
     if week_match and i + 1 < len(lines):
         next_line = lines[i + 1].strip()
-        next_day_match = day_pattern.search(next_line)
+        next_day_match = _DAY_RE.search(next_line)
         if next_day_match:
             week = week_match.group(1)
             day_text = next_day_match.group(1).replace("、", "-")
@@ -74,7 +101,7 @@ def _detect_day_from_lines(lines: List[str], i: int) -> Optional[Dict]:
     # Case C: day on this line (without week) — sometimes PDFs split week elsewhere
     if day_match and i - 1 >= 0:
         prev_line = lines[i - 1].strip()
-        prev_week_match = week_pattern.search(prev_line)
+        prev_week_match = _WEEK_RE.search(prev_line)
         if prev_week_match:
             week = prev_week_match.group(1)
             day_text = day_match.group(1).replace("、", "-")
@@ -96,131 +123,234 @@ def _detect_day_from_lines(lines: List[str], i: int) -> Optional[Dict]:
     return None
 
 
-def extract_devotional_data(pdf_path: str) -> List[Dict]:
-    all_days: List[Dict] = []
-    current_day: Optional[Dict] = None
+def _index_day_headers(lines: List[str]) -> Dict[int, Dict]:
+    """Scan `lines` once and map line index -> detected day header dict.
+
+    Detection depends only on the line and its neighbours, so one upfront
+    pass lets the main loop and the reflection scanner use dictionary
+    lookups instead of re-running the regex detector per line.
+    """
+    headers: Dict[int, Dict] = {}
+    for i in range(len(lines)):
+        detected = _detect_day_from_lines(lines, i)
+        if detected:
+            headers[i] = detected
+    return headers
 
-    verse_pattern = re.compile(r"金句：(.*)")
 
+def _finalize_day(day: Dict) -> None:
+    """Join the accumulated content/reflection line buffers and normalize.
+
+    Days are built up as lists of lines (appending to a list is O(1),
+    whereas repeated string += is quadratic in the total length); this
+    converts them to the normalized string form expected by callers.
+    """
+    day.pop("_excluded", None)
+    day["content"] = _normalize_text("\n".join(day.get("content", [])))
+    day["reflection"] = _normalize_text("\n".join(day.get("reflection", [])))
+
+
+def extract_devotional_data(
+    pdf_path: str,
+    workers: Optional[int] = None,
+    page_lines: Optional[Dict[int, List[str]]] = None,
+) -> List[Dict]:
+    """Open `pdf_path` and extract the day entries from it.
+
+    Args:
+        pdf_path: path to the PDF file.
+        workers: number of worker processes for page text extraction.
+            Defaults to os.cpu_count(). Page text extraction is per-page
+            independent, so it parallelizes cleanly; the day-assembly state
+            machine still runs sequentially in this process because day
+            state carries across page boundaries.
+        page_lines: optional dict the extractor fills with page_number ->
+            extracted lines, so callers (e.g. app.tables) can reuse the
+            text instead of re-running page.extract_text() per page.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        # for small documents (or a single worker) the process spawn and
+        # per-worker PDF open cost more than they save
+        if workers <= 1 or page_count < 2 * workers:
+            return _extract_from_pdf_object(pdf, page_lines=page_lines)
+
+    # split page indices into one contiguous chunk per worker; each worker
+    # opens its own PDF handle and returns (page_index, lines) pairs
+    chunk = -(-page_count // workers)
+    index_chunks = [
+        range(start, min(start + chunk, page_count))
+        for start in range(0, page_count, chunk)
+    ]
+    pages_lines: List[Optional[List[str]]] = [None] * page_count
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(
+            partial(_extract_page_lines, pdf_path), index_chunks
+        ):
+            for pno, lines in result:
+                pages_lines[pno] = lines
+                if page_lines is not None:
+                    page_lines[pno] = lines
+    return _assemble_days(
+        (pno, lines) for pno, lines in enumerate(pages_lines) if lines
+    )
+
+
+def _extract_page_lines(pdf_path, page_indices) -> List[tuple]:
+    """Worker: extract text lines for a chunk of pages of `pdf_path`."""
+    out = []
     with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
+        for pno in page_indices:
+            text = pdf.pages[pno].extract_text()
+            if text:
+                out.append((pno, text.split("\n")))
+    return out
+
+
+def _extract_from_pdf_object(
+    pdf, page_lines: Optional[Dict[int, List[str]]] = None
+) -> List[Dict]:
+    """Extract day entries from an already-open pdfplumber PDF.
+
+    Split out from extract_devotional_data so callers that also need table
+    detection (app.tables) can reuse one open PDF instead of re-parsing the
+    file per pass. When `page_lines` is given it is filled with
+    page_number -> lines as a text-extraction cache for those callers.
+    """
+
+    def pages_lines():
+        for pno, page in enumerate(pdf.pages):
             text = page.extract_text()
-            if not text:
-                continue
+            if text:
+                lines = text.split("\n")
+                if page_lines is not None:
+                    page_lines[pno] = lines
+                yield pno, lines
 
-            lines = text.split("\n")
-
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                # detect new day header using helper
-                detected = _detect_day_from_lines(lines, i)
-                if detected:
-                    # save previous day
-                    if current_day:
-                        # normalize content/reflection before saving
-                        current_day["content"] = _normalize_text(
-                            current_day.get("content", "")
-                        )
-                        current_day["reflection"] = _normalize_text(
-                            current_day.get("reflection", "")
-                        )
-                        all_days.append(current_day)
-
-                    week = detected["week"]
-                    day_text = detected["day_text"]
-                    consumed = detected["consumed"]
-                    header_title = detected.get("header_title")
-                    header_scripture = detected.get("header_scripture")
-
-                    # title and scripture are expected to follow after the header
-                    title_idx = i + consumed
-                    scripture_idx = i + consumed + 1
-                    # prefer header values when available
-                    if header_title:
-                        title = header_title
-                    else:
-                        title = (
-                            lines[title_idx].strip() if title_idx < len(lines) else ""
-                        )
-
-                    if header_scripture:
-                        scripture = header_scripture
-                    else:
-                        scripture = (
-                            lines[scripture_idx].strip()
-                            if scripture_idx < len(lines)
-                            else ""
-                        )
-
-                    current_day = {
-                        "day_label": f"第{week}周 第{day_text}日",
-                        "title": title,
-                        "scripture": scripture,
-                        "content": "",
-                        "reflection": "",
-                        "verse": "",
-                    }
-                    # advance index: skip header lines plus any title/scripture lines
-                    skip = consumed
-                    if not header_title:
-                        skip += 1
-                    if not header_scripture:
-                        skip += 1
-                    i += skip
-                    continue
+    return _assemble_days(pages_lines())
 
-                if not current_day:
-                    i += 1
-                    continue
 
-                # 2. detect verse
-                verse_match = verse_pattern.search(line)
-                if verse_match:
-                    current_day["verse"] = verse_match.group(1)
-                    # collect subsequent lines as reflection until next day header,
-                    # skipping any prompt lines like those starting with "请用" or
-                    # containing prompt keywords (思考/提醒/意义)
-                    j = i + 1
-                    while j < len(lines):
-                        nl = lines[j].strip()
-                        # stop if a new day header starts here
-                        if _detect_day_from_lines(lines, j):
-                            break
-                        if not nl:
-                            j += 1
-                            continue
-                        if nl.startswith("请用") or any(
-                            k in nl for k in ("思考", "提醒", "意义")
-                        ):
-                            j += 1
-                            continue
-                        current_day["reflection"] += nl + "\n"
-                        j += 1
-                    i = j
-                    continue
+def _assemble_days(pages_lines) -> List[Dict]:
+    """Run the sequential day-assembly state machine over per-page lines.
 
-                # 3. previously we treated explicit prompts as reflection, but
-                # prompts like "请用"/"思考"/"提醒"/"意义" should be ignored.
+    `pages_lines` is an iterable of (page_number, lines) pairs in document
+    order. Day state (the entry being built) carries across pages, so this
+    part cannot be parallelized. Each day records the page its header was
+    found on under "_source_page" so downstream passes (app.tables) can
+    map pages to days without re-reading the PDF.
+    """
+    all_days: List[Dict] = []
+    current_day: Optional[Dict] = None
 
-                # 4. otherwise append to content (filter out page headers)
-                if (
-                    line
-                    and "PAGE" not in line
-                    and line != current_day["title"]
-                    and line != current_day["scripture"]
-                ):
-                    current_day["content"] += line + "\n"
+    for pno, lines in pages_lines:
+        header_map = _index_day_headers(lines)
+
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            # detect new day header using the precomputed index
+            detected = header_map.get(i)
+            if detected:
+                # save previous day
+                if current_day:
+                    _finalize_day(current_day)
+                    all_days.append(current_day)
+
+                week = detected["week"]
+                day_text = detected["day_text"]
+                consumed = detected["consumed"]
+                header_title = detected.get("header_title")
+                header_scripture = detected.get("header_scripture")
+
+                # title and scripture are expected to follow after the header
+                title_idx = i + consumed
+                scripture_idx = i + consumed + 1
+                # prefer header values when available
+                if header_title:
+                    title = header_title
+                else:
+                    title = (
+                        lines[title_idx].strip() if title_idx < len(lines) else ""
+                    )
+
+                if header_scripture:
+                    scripture = header_scripture
+                else:
+                    scripture = (
+                        lines[scripture_idx].strip()
+                        if scripture_idx < len(lines)
+                        else ""
+                    )
+
+                current_day = {
+                    "day_label": f"第{week}周 第{day_text}日",
+                    "title": title,
+                    "scripture": scripture,
+                    "content": [],
+                    "reflection": [],
+                    "verse": "",
+                    "_source_page": pno,
+                    # hashed lookup replaces two equality checks per line in
+                    # the content filter below; dropped at finalize time
+                    "_excluded": {title, scripture},
+                }
+                # advance index: skip header lines plus any title/scripture lines
+                skip = consumed
+                if not header_title:
+                    skip += 1
+                if not header_scripture:
+                    skip += 1
+                i += skip
+                continue
 
+            if not current_day:
                 i += 1
+                continue
+
+            # 2. detect verse
+            verse_idx = line.find(_VERSE_MARKER)
+            if verse_idx >= 0:
+                current_day["verse"] = line[verse_idx + len(_VERSE_MARKER) :]
+                # collect subsequent lines as reflection until next day header,
+                # skipping any prompt lines like those starting with "请用" or
+                # containing prompt keywords (思考/提醒/意义)
+                j = i + 1
+                while j < len(lines):
+                    nl = lines[j].strip()
+                    # stop if a new day header starts here
+                    if j in header_map:
+                        break
+                    if not nl:
+                        j += 1
+                        continue
+                    if _PROMPT_RE.search(nl):
+                        j += 1
+                        continue
+                    current_day["reflection"].append(nl)
+                    j += 1
+                i = j
+                continue
+
+            # 3. previously we treated explicit prompts as reflection, but
+            # prompts like "请用"/"思考"/"提醒"/"意义" should be ignored.
+
+            # 4. otherwise append to content (filter out page headers)
+            if (
+                line
+                and "PAGE" not in line
+                and line not in current_day["_excluded"]
+            ):
+                current_day["content"].append(line)
 
-        # append last day
-        if current_day:
-            current_day["content"] = _normalize_text(current_day.get("content", ""))
-            current_day["reflection"] = _normalize_text(
-                current_day.get("reflection", "")
-            )
-            all_days.append(current_day)
+            i += 1
+
+    # append last day
+    if current_day:
+        _finalize_day(current_day)
+        all_days.append(current_day)
 
     return all_days
 
@@ -234,20 +364,15 @@ def extract_from_text(text: str) -> List[Dict]:
     all_days: List[Dict] = []
     current_day: Optional[Dict] = None
 
-    verse_pattern = re.compile(r"金句：(.*)")
-
     lines = text.split("\n")
+    header_map = _index_day_headers(lines)
     i = 0
     while i < len(lines):
         line = lines[i].strip()
-        detected = _detect_day_from_lines(lines, i)
+        detected = header_map.get(i)
         if detected:
             if current_day:
-                # normalize content/reflection before saving
-                current_day["content"] = _normalize_text(current_day.get("content", ""))
-                current_day["reflection"] = _normalize_text(
-                    current_day.get("reflection", "")
-                )
+                _finalize_day(current_day)
                 all_days.append(current_day)
 
             week = detected["week"]
@@ -275,9 +400,10 @@ def extract_from_text(text: str) -> List[Dict]:
                 "day_label": f"第{week}周 第{day_text}日",
                 "title": title,
                 "scripture": scripture,
-                "content": "",
-                "reflection": "",
+                "content": [],
+                "reflection": [],
                 "verse": "",
+                "_excluded": {title, scripture},
             }
             # advance index: skip header lines plus any title/scripture lines
             skip = consumed
@@ -292,9 +418,9 @@ def extract_from_text(text: str) -> List[Dict]:
             i += 1
             continue
 
-        verse_match = verse_pattern.search(line)
-        if verse_match:
-            current_day["verse"] = verse_match.group(1)
+        verse_idx = line.find(_VERSE_MARKER)
+        if verse_idx >= 0:
+            current_day["verse"] = line[verse_idx + len(_VERSE_MARKER) :]
             # collect subsequent lines as reflection until next day header,
             # skipping any prompt lines like those starting with "请用" or
             # containing prompt keywords (思考/提醒/意义)
@@ -302,17 +428,15 @@ def extract_from_text(text: str) -> List[Dict]:
             while j < len(lines):
                 nl = lines[j].strip()
                 # stop if a new day header starts here
-                if _detect_day_from_lines(lines, j):
+                if j in header_map:
                     break
                 if not nl:
                     j += 1
                     continue
-                if nl.startswith("请用") or any(
-                    k in nl for k in ("思考", "提醒", "意义")
-                ):
+                if _PROMPT_RE.search(nl):
                     j += 1
                     continue
-                current_day["reflection"] += nl + "\n"
+                current_day["reflection"].append(nl)
                 j += 1
             i = j
             continue
@@ -320,16 +444,14 @@ def extract_from_text(text: str) -> List[Dict]:
         if (
             line
             and "PAGE" not in line
-            and line != current_day["title"]
-            and line != current_day["scripture"]
+            and line not in current_day["_excluded"]
         ):
-            current_day["content"] += line + "\n"
+            current_day["content"].append(line)
 
         i += 1
 
     if current_day:
-        current_day["content"] = _normalize_text(current_day.get("content", ""))
-        current_day["reflection"] = _normalize_text(current_day.get("reflection", ""))
+        _finalize_day(current_day)
         all_days.append(current_day)
 
     return all_days
@@ -340,6 +462,10 @@ if __name__ == "__main__":
     pdf_file = "daily-walk-with-God.pdf"
     data = extract_devotional_data(pdf_file)
 
+    # _source_page is pipeline-internal; keep the JSON schema unchanged
+    for day in data:
+        day.pop("_source_page", None)
+
     # write JSON
     with open("bibleData.json", "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
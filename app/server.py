@@ -17,6 +17,41 @@ import os
 import argparse
 
 
+class StaticFileHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler that streams file bodies with os.sendfile.
+
+    The stdlib handler copies files through a user-space buffer; when both
+    ends are real file descriptors (regular file -> socket) os.sendfile
+    moves the bytes inside the kernel with zero copies. Falls back to the
+    normal buffered copy for anything else (e.g. directory listings served
+    from BytesIO, or platforms without sendfile).
+    """
+
+    def copyfile(self, source, outputfile):
+        if hasattr(os, "sendfile"):
+            try:
+                in_fd = source.fileno()
+                out_fd = outputfile.fileno()
+            except (AttributeError, OSError, ValueError):
+                pass
+            else:
+                try:
+                    offset = 0
+                    remaining = os.fstat(in_fd).st_size
+                    while remaining > 0:
+                        sent = os.sendfile(out_fd, in_fd, offset, remaining)
+                        if sent == 0:
+                            break
+                        offset += sent
+                        remaining -= sent
+                    return
+                except OSError:
+                    # fall through to the buffered copy (sendfile can fail
+                    # on some filesystems or socket states)
+                    pass
+        super().copyfile(source, outputfile)
+
+
 def run_server(port: int = 8000) -> None:
     """Run a simple HTTP server serving the current working directory.
 
@@ -24,7 +59,7 @@ def run_server(port: int = 8000) -> None:
         port: TCP port to bind to. Defaults to 8000.
     """
     addr = ("0.0.0.0", port)
-    handler = SimpleHTTPRequestHandler
+    handler = StaticFileHandler
     httpd = ThreadingHTTPServer(addr, handler)
     print(f"Serving HTTP on {addr[0]} port {addr[1]} (http://{addr[0]}:{addr[1]}/) ...")
     try:
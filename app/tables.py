@@ -7,7 +7,10 @@ of the extracted devotional data. It uses the same header-detection helper from
 """
 
 from typing import List, Dict, Any, Optional
-import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 try:
     import pdfplumber
@@ -28,6 +31,39 @@ except Exception:
         return (s or "").strip()
 
 
+# Default pdfplumber table settings, shared by every detection call so the
+# dict is built once instead of per page.
+_DEFAULT_TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "intersection_tolerance": 5,
+    "snap_tolerance": 3,
+    "join_tolerance": 3,
+}
+
+# Faster alternative for text-dominated pages without ruled borders: the
+# "text" strategies skip pdfplumber's per-page line-object enumeration.
+# Pass as table_settings where the document is known to suit it.
+TEXT_TABLE_SETTINGS = {
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+}
+
+# Patterns for the split-table merge heuristics below; compiled once at
+# import instead of per _merge_split_tables_across_days call.
+_TABLE_RE = re.compile(r"(?is)(<table.*?>.*?</table>)")
+_CHAPTER_RE = re.compile(r"第\s*(?:[0-9]+|[一二三四五六七八九十百零]+)\s*章")
+_INNER_RE = re.compile(r"[第章\s]")
+
+# Single-pass escape tables: one str.translate call replaces the chained
+# str.replace calls inside html.escape (and the per-cell pipe escape for
+# Markdown), which matters for tables with many cells.
+_HTML_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+_MD_ESCAPE = str.maketrans({"|": "\\|"})
+
+
 # Debug helper used by this module to emit searchable logs during extraction
 def _debug(*args):
     try:
@@ -44,33 +80,44 @@ def find_tables_in_pdf(
     Returns a mapping: page_number (0-based) -> list of tables, where each table
     is a list of rows and each row is a list of cell strings.
     """
-    if table_settings is None:
-        table_settings = {
-            "vertical_strategy": "lines",
-            "horizontal_strategy": "lines",
-            "intersection_tolerance": 5,
-            "snap_tolerance": 3,
-            "join_tolerance": 3,
-        }
-
-    page_tables: Dict[int, List[List[List[str]]]] = {}
+    return {pno: tables for pno, tables in iter_tables_in_pdf(pdf_path, table_settings)}
+
+
+def iter_tables_in_pdf(pdf_path: str, table_settings: Optional[dict] = None):
+    """Yield (page_number, tables) pairs as pages are scanned.
+
+    Generator form of find_tables_in_pdf: consumers that process tables
+    page-by-page avoid holding every page's cell strings in memory at
+    once; only pages that contain tables are yielded.
+    """
     with pdfplumber.open(pdf_path) as pdf:
         for pno, page in enumerate(pdf.pages):
-            tables = []
-            found = page.find_tables(table_settings=table_settings)
-            for table in found:
-                try:
-                    rows = table.extract()
-                except Exception:
-                    # fallback to page.extract_table for this table
-                    rows = page.extract_table()
-                if rows:
-                    # normalize cell values to strings
-                    norm_rows = [[(cell or "").strip() for cell in row] for row in rows]
-                    tables.append(norm_rows)
+            tables = _tables_on_page(page, table_settings)
             if tables:
-                page_tables[pno] = tables
-    return page_tables
+                yield pno, tables
+
+
+def _tables_on_page(page, table_settings: Optional[dict] = None) -> List[List[List[str]]]:
+    """Detect and extract the tables on a single pdfplumber page."""
+    if table_settings is None:
+        table_settings = _DEFAULT_TABLE_SETTINGS
+
+    tables = []
+    found = page.find_tables(table_settings=table_settings)
+    for table in found:
+        try:
+            rows = table.extract()
+        except (IndexError, AttributeError, ValueError) as e:
+            # skip just this table; the old page.extract_table() fallback
+            # re-ran detection for the whole page and returned the first
+            # table, not necessarily this one
+            _debug(f"table.extract() failed: {e}")
+            continue
+        if rows:
+            # normalize cell values to strings
+            norm_rows = [[(cell or "").strip() for cell in row] for row in rows]
+            tables.append(norm_rows)
+    return tables
 
 
 def table_to_markdown(table: List[List[str]]) -> str:
@@ -84,14 +131,13 @@ def table_to_markdown(table: List[List[str]]) -> str:
 
     # Escape pipes in content
     def esc(s: str) -> str:
-        return s.replace("|", "\\|")
+        return s.translate(_MD_ESCAPE)
 
-    header = rows[0]
-    md = "| " + " | ".join(esc(c) for c in header) + " |\n"
-    md += "|" + " --- |" * len(header) + "\n"
-    for r in rows[1:]:
-        md += "| " + " | ".join(esc(c) for c in r) + " |\n"
-    return md
+    # list comprehensions feed join faster than generator expressions
+    # (no per-item resume overhead) and build the output in one allocation
+    parts = ["| " + " | ".join([esc(c) for c in r]) + " |" for r in rows]
+    parts.insert(1, "|" + " --- |" * len(rows[0]))
+    return "\n".join(parts) + "\n"
 
 
 def table_to_html(table: List[List[str]]) -> str:
@@ -103,24 +149,70 @@ def table_to_html(table: List[List[str]]) -> str:
     header = table[0]
     html_parts.append(
         "  <thead>\n    <tr>"
-        + "".join(f"<th>{html.escape(c)}</th>" for c in header)
+        + "".join([f"<th>{c.translate(_HTML_ESCAPE)}</th>" for c in header])
         + "</tr>\n  </thead>"
     )
     html_parts.append("  <tbody>")
-    for r in table[1:]:
-        html_parts.append(
-            "    <tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in r) + "</tr>"
-        )
+    html_parts.extend(
+        [
+            "    <tr>"
+            + "".join([f"<td>{c.translate(_HTML_ESCAPE)}</td>" for c in r])
+            + "</tr>"
+            for r in table[1:]
+        ]
+    )
     html_parts.append("  </tbody>")
     html_parts.append("</table>")
     return "\n".join(html_parts)
 
 
+def _strip_cell_texts(content: str, table: List[List[str]]) -> str:
+    """Remove table cell strings from `content` in a single scan.
+
+    Replaces the old per-cell `in` + `replace` loop, which rescanned the
+    whole content string once per cell. A compiled alternation of all cell
+    texts (longest first, so a cell that contains another still wins) does
+    the dedupe in one pass inside the regex engine.
+    """
+    needles = {
+        (cell or "").strip() for row in table for cell in row if (cell or "").strip()
+    }
+    if not needles or not content:
+        return content
+    pattern = re.compile(
+        "|".join(re.escape(n) for n in sorted(needles, key=len, reverse=True))
+    )
+    return pattern.sub(" ", content)
+
+
+def _scan_pages_worker(pdf_path, table_settings, page_indices):
+    """Worker: extract text and (for header pages) tables for a page chunk.
+
+    Returns a list of (page_number, has_day_header, tables) tuples. Each
+    worker opens its own PDF handle; table detection is skipped on pages
+    without a day header, matching the sequential path.
+    """
+    out = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for pno in page_indices:
+            page = pdf.pages[pno]
+            text = page.extract_text() or ""
+            lines = text.split("\n")
+            has_header = any(
+                _detect_day_from_lines(lines, i) for i in range(len(lines))
+            )
+            tables = _tables_on_page(page, table_settings) if has_header else []
+            out.append((pno, has_header, tables))
+    return out
+
+
 def append_tables_to_content(
     pdf_path: str,
     data: List[Dict[str, Any]],
     use_html: bool = True,
     table_settings: Optional[dict] = None,
+    page_lines: Optional[Dict[int, List[str]]] = None,
+    workers: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
     """Find tables in `pdf_path` and append them into `data` content fields.
 
@@ -134,77 +226,128 @@ def append_tables_to_content(
         data: list of day dicts produced by extract_devotional_data
         use_html: if True, append HTML tables; otherwise append Markdown tables
         table_settings: optional pdfplumber table_settings
+        page_lines: optional page_number -> lines cache populated by
+            extract_devotional_data; when given, the day-header scan reuses
+            it instead of re-running page.extract_text() on every page
+        workers: number of worker processes for the per-page scan; defaults
+            to os.cpu_count(). Page scanning is per-page independent, so it
+            parallelizes cleanly; table assignment stays sequential. The
+            single-process path is used for small documents, workers=1, or
+            when a page_lines cache makes re-extraction unnecessary.
 
     Returns the modified `data` (same list instance returned for convenience).
     """
-    page_tables = find_tables_in_pdf(pdf_path, table_settings=table_settings)
-    if not page_tables:
-        return data
+    # Single traversal: find tables and resolve each page's day index in
+    # one pass, so the PDF is opened (and its xref parsed) only once and
+    # the assignment loop below is a plain ordered iteration without any
+    # dict lookups or a sorted() pass over page keys.
+    # NOTE: per user request, only include tables if the page contains a
+    # day header. Tables on pages without a day header are skipped rather
+    # than attached to the previous day (and table detection — the
+    # dominant cost per page — is not even run there).
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    ordered_pages: List[tuple] = []  # (page_number, day_idx, tables)
+
+    # Fast path: when the extractor recorded each day's source page we can
+    # map pages to days directly and visit only those pages for table
+    # detection — no text re-extraction at all.
+    if data and all("_source_page" in d for d in data):
+        page_map: Dict[int, int] = {}
+        for idx, d in enumerate(data):
+            page_map.setdefault(d["_source_page"], idx)
+        wanted = sorted(page_map)
+        # lazy open: parse only the pages we will actually inspect
+        # (pdfplumber page numbers are 1-based)
+        with pdfplumber.open(pdf_path, pages=[p + 1 for p in wanted]) as pdf:
+            for pno, page in zip(wanted, pdf.pages):
+                tables = _tables_on_page(page, table_settings)
+                if tables:
+                    ordered_pages.append((pno, page_map[pno], tables))
+        return _assign_tables(data, ordered_pages, use_html)
 
-    # Build mapping of page -> day_index by scanning pages for day headers
-    page_to_day_idx: Dict[int, Optional[int]] = {}
     day_idx = 0
     with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        if page_lines is None and workers > 1 and page_count >= 2 * workers:
+            # parallel scan: chunk page indices across worker processes,
+            # then merge results in page order so day indices line up with
+            # the sequential extraction order
+            chunk = -(-page_count // workers)
+            index_chunks = [
+                range(start, min(start + chunk, page_count))
+                for start in range(0, page_count, chunk)
+            ]
+            scanned: List[Optional[tuple]] = [None] * page_count
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for result in executor.map(
+                    partial(_scan_pages_worker, pdf_path, table_settings),
+                    index_chunks,
+                ):
+                    for pno, has_header, tables in result:
+                        scanned[pno] = (has_header, tables)
+            for pno, entry in enumerate(scanned):
+                if entry is None:
+                    continue
+                has_header, tables = entry
+                if not has_header:
+                    continue
+                if tables:
+                    ordered_pages.append((pno, day_idx, tables))
+                day_idx += 1
+            return _assign_tables(data, ordered_pages, use_html)
+
         for pno, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            lines = text.split("\n")
+            if page_lines is not None and pno in page_lines:
+                lines = page_lines[pno]
+            else:
+                text = page.extract_text() or ""
+                lines = text.split("\n")
             found_day_on_page = False
             for i, _ in enumerate(lines):
                 if _detect_day_from_lines(lines, i):
-                    page_to_day_idx[pno] = day_idx
-                    day_idx += 1
                     found_day_on_page = True
                     break
             if not found_day_on_page:
-                page_to_day_idx[pno] = None
+                continue
+
+            page_day_idx = day_idx
+            day_idx += 1
+            tables = _tables_on_page(page, table_settings)
+            if tables:
+                ordered_pages.append((pno, page_day_idx, tables))
+
+    return _assign_tables(data, ordered_pages, use_html)
 
-    # Now assign tables to days.
-    # NOTE: per user request, only include tables if the page contains a
-    # day header (i.e. mapped -> not None). Tables on pages without a day
-    # header are skipped rather than attached to the previous day.
-    for pno in sorted(page_tables.keys()):
-        mapped = page_to_day_idx.get(pno)
-        if mapped is None:
-            # skip tables on pages that don't have an explicit day header
-            continue
 
-        target_idx = mapped
+def _assign_tables(
+    data: List[Dict[str, Any]],
+    ordered_pages: List[tuple],
+    use_html: bool,
+) -> List[Dict[str, Any]]:
+    """Append the collected per-page tables into their day entries."""
+    for _pno, target_idx, page_table_list in ordered_pages:
         if target_idx >= len(data):
             # out-of-range day index
             continue
 
-        for table in page_tables[pno]:
-            # Remove overlapping plain-text snippets from the day's content
-            # if they match table cell texts. This is a best-effort dedupe:
-            # for each non-empty cell string, remove exact occurrences from
-            # the content before appending the table markup.
-            content = data[target_idx].get("content", "") or ""
-            for row in table:
-                for cell in row:
-                    cell_text = (cell or "").strip()
-                    if not cell_text:
-                        continue
-                    # remove exact occurrences; replace with a single space
-                    if cell_text in content:
-                        content = content.replace(cell_text, " ")
-
-            # normalize cleaned content and put it back
-            content = _normalize_text(content)
-            data[target_idx]["content"] = content
-
-            # build markup and append
+        # Remove overlapping plain-text snippets from the day's content when
+        # they match table cell texts (best-effort dedupe), collect all table
+        # markup, then normalize once — the old code re-normalized the
+        # growing content for every table on the page.
+        content = data[target_idx].get("content", "") or ""
+        markups = []
+        for table in page_table_list:
+            content = _strip_cell_texts(content, table)
             if use_html:
-                markup = table_to_html(table)
+                markups.append(table_to_html(table))
             else:
-                markup = table_to_markdown(table)
+                markups.append(table_to_markdown(table))
 
-            # append with separators then normalize
-            data[target_idx]["content"] = _normalize_text(
-                (data[target_idx].get("content", "") or "") + " \n\n " + markup
-            )
-            data[target_idx]["reflection"] = _normalize_text(
-                data[target_idx].get("reflection", "")
-            )
+        data[target_idx]["content"] = _normalize_text(
+            content + " \n\n " + " \n\n ".join(markups)
+        )
 
     return data
 
@@ -226,76 +369,93 @@ def _merge_split_tables_across_days(data: List[Dict[str, Any]]) -> None:
     _debug and never raises on unexpected input.
     """
     try:
-        import re
-
-        table_re = re.compile(r'(?is)(<table.*?>.*?</table>)')
-        chapter_re = re.compile(r'第\s*(?:[0-9]+|[一二三四五六七八九十百零]+)\s*章')
+        # Common case: no day has any table markup at all — skip the three
+        # passes entirely after one cheap substring sweep.
+        if not any("<table" in (d.get("content") or "") for d in data):
+            return
+
+        # Cache each day's content string and its table spans once; the
+        # three passes below invalidate a cache entry only when they mutate
+        # that day, instead of re-running _TABLE_RE.finditer over every
+        # day's full content three times.
+        texts = [(d.get("content") or "") for d in data]
+        spans: List[Optional[List]] = [None] * len(data)
+
+        def tables_in(idx: int) -> List:
+            if spans[idx] is None:
+                spans[idx] = list(_TABLE_RE.finditer(texts[idx]))
+            return spans[idx]
+
+        def set_text(idx: int, value: str) -> None:
+            texts[idx] = _normalize_text(value)
+            spans[idx] = None
+            data[idx]["content"] = texts[idx]
 
         # Pass 1: move first-table-from-current-to-previous when current
         # starts with a table and previous already has a table.
         for i in range(1, len(data)):
-            prev = (data[i - 1].get('content') or '')
-            cur = (data[i].get('content') or '')
+            prev = texts[i - 1]
+            cur = texts[i]
             if not prev or not cur:
                 continue
-            if cur.lstrip().lower().startswith('<table') and '<table' in prev.lower():
-                m = table_re.search(cur)
-                if not m:
-                    continue
-                first_tbl = m.group(1) if m.groups() else m.group(0)
-                # avoid duplicating if identical table already present
-                if first_tbl in prev:
-                    _debug(f"[TABLE_DEBUG] merge1: first table already in prev day_idx={i-1}, skipping")
-                    continue
-                new_cur = (cur[: m.start()] + cur[m.end():]).strip()
-                new_prev = prev.rstrip() + '\n\n' + first_tbl
-                data[i - 1]['content'] = _normalize_text(new_prev)
-                data[i]['content'] = _normalize_text(new_cur)
-                _debug(f"[TABLE_DEBUG] merge1: moved first table from day_idx={i} into day_idx={i-1}")
+            cur_tables = tables_in(i)
+            # "starts with a table" == first table match begins at the first
+            # non-whitespace character (avoids lowercasing the whole string)
+            if not cur_tables or cur_tables[0].start() != len(cur) - len(cur.lstrip()):
+                continue
+            if not tables_in(i - 1):
+                continue
+            m = cur_tables[0]
+            first_tbl = m.group(1)
+            # avoid duplicating if identical table already present
+            if first_tbl in prev:
+                _debug(f"[TABLE_DEBUG] merge1: first table already in prev day_idx={i-1}, skipping")
+                continue
+            set_text(i, (cur[: m.start()] + cur[m.end():]).strip())
+            set_text(i - 1, prev.rstrip() + '\n\n' + first_tbl)
+            _debug(f"[TABLE_DEBUG] merge1: moved first table from day_idx={i} into day_idx={i-1}")
 
         # Pass 2: chapter-aware forward move: if the previous day's trailing
         # table looks like a chapter header (2+ chapter tokens) and the
         # current day's metadata contains those tokens, move it forward.
         for i in range(1, len(data)):
-            prev = (data[i - 1].get('content') or '')
-            cur = (data[i].get('content') or '')
+            prev = texts[i - 1]
+            cur = texts[i]
             if not prev or not cur:
                 continue
-            prev_tables = list(table_re.finditer(prev))
+            prev_tables = tables_in(i - 1)
             if not prev_tables:
                 continue
             last_m = prev_tables[-1]
-            last_tbl = last_m.group(1) if last_m.groups() else last_m.group(0)
-            chs = chapter_re.findall(last_tbl)
+            last_tbl = last_m.group(1)
+            chs = _CHAPTER_RE.findall(last_tbl)
             if len(chs) < 2:
                 continue
             cur_meta = ' '.join([
                 (data[i].get('scripture') or ''),
                 (data[i].get('title') or ''),
-                (data[i].get('content') or ''),
+                cur,
             ])
 
-            def inner(tok: str) -> str:
-                return re.sub(r'[第章\s]', '', tok)
-
-            if any((ch in cur_meta) or (inner(ch) in cur_meta) for ch in chs):
+            if any(
+                (ch in cur_meta) or (_INNER_RE.sub("", ch) in cur_meta)
+                for ch in chs
+            ):
                 if last_tbl in cur:
                     _debug(f"[TABLE_DEBUG] merge2: trailing chapter table already in day_idx={i}, skipping")
                 else:
-                    new_prev = prev[: last_m.start()] + prev[last_m.end():]
-                    new_cur = last_tbl + '\n\n' + cur
-                    data[i - 1]['content'] = _normalize_text(new_prev)
-                    data[i]['content'] = _normalize_text(new_cur)
+                    set_text(i - 1, prev[: last_m.start()] + prev[last_m.end():])
+                    set_text(i, last_tbl + '\n\n' + cur)
                     _debug(f"[TABLE_DEBUG] merge2: moved trailing chapter table from day_idx={i-1} into day_idx={i} tokens={chs}")
 
         # Pass 3: dedupe exact table blocks that appear in previous and current
         # day; remove the later occurrence.
         for i in range(1, len(data)):
-            prev = (data[i - 1].get('content') or '')
-            cur = (data[i].get('content') or '')
+            prev = texts[i - 1]
+            cur = texts[i]
             if not prev or not cur:
                 continue
-            prev_tbls = [m.group(1) if m.groups() else m.group(0) for m in table_re.finditer(prev)]
+            prev_tbls = [m.group(1) for m in tables_in(i - 1)]
             if not prev_tbls:
                 continue
             changed = False
@@ -305,6 +465,6 @@ def _merge_split_tables_across_days(data: List[Dict[str, Any]]) -> None:
                     changed = True
                     _debug(f"[TABLE_DEBUG] dedupe: removed duplicate table from day_idx={i} because it exists in day_idx={i-1}")
             if changed:
-                data[i]['content'] = _normalize_text(cur)
+                set_text(i, cur)
     except Exception as e:
         _debug(f"[TABLE_DEBUG] _merge_split_tables_across_days failed: {e}")
@@ -9,6 +9,20 @@ import re
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+try:
+    # optional: orjson (Rust) emits UTF-8 directly and serializes several
+    # times faster than the stdlib pretty-printer on a file this size.
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # optional: lxml's iterparse is several times faster than the stdlib
+    # parser on a file this size; fall back to ElementTree when absent.
+    from lxml import etree as _etree
+except ImportError:
+    _etree = ET
+
 # Book number to name mapping (for the new XML format)
 BOOK_NUMBER_MAP = {
     # Old Testament (1-39)
@@ -103,6 +117,11 @@ CHINESE_BOOK_MAP = {
 }
 
 
+# Book names sorted longest-first so prefix matching can stop at the first
+# hit instead of scanning all ~130 entries to find the longest match.
+_BOOK_NAMES_SORTED = sorted(CHINESE_BOOK_MAP.items(), key=lambda kv: -len(kv[0]))
+
+
 # Canonical Chinese Book Names for Display
 CODE_TO_CHINESE_MAP = {
     'GEN': '创世记', 'EXO': '出埃及记', 'LEV': '利未记', 'NUM': '民数记', 'DEU': '申命记',
@@ -122,28 +141,42 @@ CODE_TO_CHINESE_MAP = {
 }
 
 
+# Compiled once; parse_verse_reference runs per segment per JSON entry.
+_SEG_SPLIT_RE = re.compile(r'[,，;；、]')
+_CHAPTER_IN_SEG_RE = re.compile(r'([零一二三四五六七八九十百廿卅\d]+)[章篇]')
+_CLEAN_VERSES_RE = re.compile(r'[节\s]')
+
+
+# Chinese numeral values; hoisted so parse_chinese_number doesn't rebuild
+# the dict per call, with an ord()-indexed array so the per-character hot
+# loop is an array index instead of a dict hash.
+_CHN_NUM_MAP = {
+    '零': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
+    '百': 100, '千': 1000,
+    '廿': 20, '卅': 30  # Common in Chinese Bible references
+}
+_CHN_NUM_VALS = [None] * 0x10000
+for _char, _val in _CHN_NUM_MAP.items():
+    _CHN_NUM_VALS[ord(_char)] = _val
+
+
 def parse_chinese_number(chn_num_str):
     """Convert Chinese number string to integer."""
     if not chn_num_str:
         return 0
     if chn_num_str.isdigit():
         return int(chn_num_str)
-        
-    chn_map = {
-        '零': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9, '十': 10,
-        '百': 100, '千': 1000,
-        '廿': 20, '卅': 30  # Common in Chinese Bible references
-    }
-    
+
     result = 0
     temp = 0
     
     # Handle special single chars directly
-    if len(chn_num_str) == 1 and chn_num_str in chn_map:
-        return chn_map[chn_num_str]
+    if len(chn_num_str) == 1 and chn_num_str in _CHN_NUM_MAP:
+        return _CHN_NUM_MAP[chn_num_str]
 
     for char in chn_num_str:
-        val = chn_map.get(char)
+        cp = ord(char)
+        val = _CHN_NUM_VALS[cp] if cp < 0x10000 else None
         if val is None:
             continue
             
@@ -184,12 +217,13 @@ def parse_verse_reference(ref_str):
     current_book = None
     book_len = 0
     
-    for name, code in CHINESE_BOOK_MAP.items():
+    for name, code in _BOOK_NAMES_SORTED:
         if ref_str.startswith(name):
-            if len(name) > book_len:
-                book_len = len(name)
-                current_book = code
-                
+            book_len = len(name)
+            current_book = code
+            break
+
+
     if not current_book:
         print(f"Warning: Could not parse book from '{ref_str}'")
         return []
@@ -200,7 +234,7 @@ def parse_verse_reference(ref_str):
     # 2. Split into segments by separators (comma, semicolon, etc.)
     # We want to split by commonly used separators: ， , ； ; 、
     # Note: '、' is often used for verses within same chapter (1, 3), but logic handles it fine if we treat as segment
-    segments = re.split(r'[,，;；、]', remaining)
+    segments = _SEG_SPLIT_RE.split(remaining)
     
     current_chapter = None
     
@@ -214,7 +248,7 @@ def parse_verse_reference(ref_str):
         
         # Check for Chapter change
         # Look for "章" or "篇" - include 廿 and 卅 for numbers like 廿六 (26)
-        chapter_match = re.search(r'([零一二三四五六七八九十百廿卅\d]+)[章篇]', segment)
+        chapter_match = _CHAPTER_IN_SEG_RE.search(segment)
         
         verses_to_parse = segment
         
@@ -231,7 +265,7 @@ def parse_verse_reference(ref_str):
             
         # Parse Verses in this segment
         # Format: "1节", "1-3节", "1至3"
-        clean_verses_str = re.sub(r'[节\s]', '', verses_to_parse)
+        clean_verses_str = _CLEAN_VERSES_RE.sub('', verses_to_parse)
         
         if not clean_verses_str:
             continue
@@ -255,6 +289,9 @@ def parse_verse_reference(ref_str):
         if parsed_verses:
             results.append({
                 'book': current_book,
+                # resolved here once so downstream lookups skip the
+                # per-call BOOK_ID_TO_NUMBER translation
+                'book_number': BOOK_ID_TO_NUMBER.get(current_book),
                 'chapter': current_chapter,
                 'verses': parsed_verses
             })
@@ -302,39 +339,70 @@ def format_verse_reference(book_id, chapter, verses):
     return f"{book_name} {chapter}:{verses_str}"
 
 
-def extract_verses_from_simplified_xml(xml_path, book_id, chapter, verses):
-    """Extract verse text from ChineseSimplifiedBible.xml file."""
+# (book_number, chapter, verse) -> text index per XML file. Built once and
+# cached so repeated extract calls don't re-parse the whole Bible XML and
+# walk it with XPath for every reference.
+_VERSE_INDEX_CACHE = {}
+
+
+def _build_verse_index(xml_path):
+    """Stream-parse the Bible XML once and index every verse for O(1) lookup.
+
+    Uses iterparse so the full document tree is never held in memory:
+    book/chapter numbers are tracked from start events, verses are indexed
+    on their end event, and finished elements are cleared immediately.
+    """
+    index = {}
+    book_number = None
+    chapter_number = None
+    for event, elem in _etree.iterparse(str(xml_path), events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'book':
+                book_number = int(elem.get('number'))
+            elif elem.tag == 'chapter':
+                chapter_number = int(elem.get('number'))
+            continue
+        if elem.tag == 'verse':
+            index[(book_number, chapter_number, int(elem.get('number')))] = \
+                (elem.text or '').strip()
+            elem.clear()
+        elif elem.tag in ('chapter', 'book'):
+            elem.clear()
+    return index
+
+
+def _get_verse_index(xml_path):
+    key = str(xml_path)
+    if key not in _VERSE_INDEX_CACHE:
+        _VERSE_INDEX_CACHE[key] = _build_verse_index(xml_path)
+    return _VERSE_INDEX_CACHE[key]
+
+
+def extract_verses_from_simplified_xml(xml_path, book_id, chapter, verses,
+                                        book_number=None):
+    """Extract verse text from ChineseSimplifiedBible.xml file.
+
+    `book_number` may be passed by callers that already resolved it (e.g.
+    from parse_verse_reference results) to skip the per-call translation.
+    """
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        
-        # Convert book ID to book number
-        book_number = BOOK_ID_TO_NUMBER.get(book_id)
+        if book_number is None:
+            # Convert book ID to book number
+            book_number = BOOK_ID_TO_NUMBER.get(book_id)
         if book_number is None:
             print(f"Warning: Book ID {book_id} not found in mapping")
             return None
-        
-        # Find the book by number attribute
-        book = root.find(f".//book[@number='{book_number}']")
-        if book is None:
-            print(f"Warning: Book number {book_number} not found in XML")
-            return None
-        
-        # Find the chapter
-        chapter_elem = book.find(f".//chapter[@number='{chapter}']")
-        if chapter_elem is None:
-            print(f"Warning: Chapter {chapter} not found in book {book_number}")
-            return None
-        
-        # Collect verse texts
-        verse_texts = []
-        for verse_num in verses:
-            verse_elem = chapter_elem.find(f".//verse[@number='{verse_num}']")
-            if verse_elem is not None and verse_elem.text:
-                verse_texts.append(verse_elem.text.strip())
-        
-        return ''.join(verse_texts) if verse_texts else None
-        
+
+        index = _get_verse_index(xml_path)
+        chapter = int(chapter)
+
+        # Collect verse texts: a sized list comprehension straight into join,
+        # with missing verses contributing empty strings
+        text = ''.join(
+            [index.get((book_number, chapter, vn), '') for vn in verses]
+        )
+        return text or None
+
     except Exception as e:
         print(f"Error extracting verses: {e}")
         import traceback
@@ -356,8 +424,11 @@ def main():
         return
     
     # Load JSON data
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if orjson is not None:
+        data = orjson.loads(json_path.read_bytes())
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     print(f"Processing {len(data)} entries...")
     
@@ -369,6 +440,12 @@ def main():
         if not verse_ref:
             continue
         
+        # already populated on a previous run; skip the XML lookups so warm
+        # reruns are effectively free
+        if entry.get('verse_text'):
+            success_count += 1
+            continue
+        
         # Parse reference (returns a list)
         parsed_list = parse_verse_reference(verse_ref)
         if not parsed_list:
@@ -383,7 +460,8 @@ def main():
                 xml_path,
                 parsed['book'],
                 parsed['chapter'],
-                parsed['verses']
+                parsed['verses'],
+                book_number=parsed.get('book_number')
             )
             if verse_text:
                 all_verse_texts.append(verse_text)
@@ -410,8 +488,11 @@ def main():
             print(f"✗ [{i+1}/{len(data)}] {entry['day_label']}: Failed to extract")
     
     # Save updated JSON
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        json_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
     
     print(f"\nDone! Successfully added verse text to {success_count}/{len(data)} entries")
 
@@ -1,25 +1,52 @@
 
+import heapq
 import json
 import re
-import statistics
+
+try:
+    # optional: selectolax strips tags in a single C pass, far faster than
+    # the regex walk; fall back to the regex when it is not installed.
+    from selectolax.parser import HTMLParser as _HTMLParser
+except ImportError:
+    _HTMLParser = None
+
+try:
+    # optional: ijson streams entries one at a time, keeping peak memory
+    # independent of the size of bibleData.json.
+    import ijson
+except ImportError:
+    ijson = None
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_PARA_RE = re.compile(r'<p>(.*?)</p>', re.DOTALL)
 
 def clean_html(text):
     """Strip HTML tags to measure raw text length."""
-    return re.sub(r'<[^>]+>', '', text)
+    if _HTMLParser is not None:
+        return _HTMLParser(text).text(separator='')
+    return _TAG_RE.sub('', text)
 
-def analyze_paragraphs():
-    with open('bibleData.json', 'r') as f:
-        data = json.load(f)
+def _iter_entries(path='bibleData.json'):
+    """Yield entries one at a time, streaming via ijson when available."""
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item')
+    else:
+        with open(path, 'r') as f:
+            yield from json.load(f)
 
-    total_entries = len(data)
+def analyze_paragraphs():
+    total_entries = 0
     has_p_wrapper = 0
     paragraph_lengths = []
     max_para_lengths = []
     broken_html_count = 0
+    starts_with_p = {}  # for the specific entry 1/2 check below
 
-    print(f"Analyzing {total_entries} entries...\n")
+    print("Analyzing entries...\n")
 
-    for i, entry in enumerate(data):
+    for i, entry in enumerate(_iter_entries()):
+        total_entries += 1
         content = entry.get('content', '')
         
         # Check 1: Does it start with <p>?
@@ -27,23 +54,22 @@ def analyze_paragraphs():
             has_p_wrapper += 1
         
         # Check 2: Paragraph Lengths
-        # Split by <p>...</p> or \n\n if plain text
+        # Split by <p>...</p> or \n\n if plain text, cleaning and measuring
+        # in the same pass instead of materializing an intermediate list
         if '<p>' in content:
-            # Extract content inside <p> tags
-            paras = re.findall(r'<p>(.*?)</p>', content, re.DOTALL)
-            # Also count non-p text blocks if mixed? simpler to just clean html and split by \n\n maybe?
-            # Let's stick to <p> contents for HTML entries
+            lengths = [len(clean_html(m.group(1)).strip())
+                       for m in _PARA_RE.finditer(content) if m.group(1).strip()]
         else:
-            paras = content.split('\n\n')
-
-        # Clean and measure
-        lengths = [len(clean_html(p).strip()) for p in paras if p.strip()]
+            lengths = [len(clean_html(p).strip())
+                       for p in content.split('\n\n') if p.strip()]
         
         if lengths:
             entry_max = max(lengths)
-            entry_avg = statistics.mean(lengths)
             paragraph_lengths.extend(lengths)
-            max_para_lengths.append((i, entry_max))
+            max_para_lengths.append((i, entry_max, entry.get('day_label')))
+
+        if i in (1, 2):
+            starts_with_p[i] = content.strip().startswith('<p>')
         
         # Check 3: Broken HTML (Simple check for unbalanced simple tags)
         # Count open/close p tags
@@ -70,14 +96,14 @@ def analyze_paragraphs():
         print(f"Entries with a paragraph > 1000 chars: {over_1000}")
     
     print("\nTop 5 entries with longest paragraphs:")
-    sorted_max = sorted(max_para_lengths, key=lambda x: x[1], reverse=True)[:5]
-    for idx, length in sorted_max:
-        print(f"- Entry {idx} ({data[idx].get('day_label')}): {length} chars")
+    sorted_max = heapq.nlargest(5, max_para_lengths, key=lambda x: x[1])
+    for idx, length, day_label in sorted_max:
+        print(f"- Entry {idx} ({day_label}): {length} chars")
 
     # Specific check for Index 1 and 2
     print(f"\n--- Specific Check ---")
-    print(f"Entry 1 starts with <p>: {data[1].get('content').strip().startswith('<p>')}")
-    print(f"Entry 2 starts with <p>: {data[2].get('content').strip().startswith('<p>')}")
+    print(f"Entry 1 starts with <p>: {starts_with_p.get(1)}")
+    print(f"Entry 2 starts with <p>: {starts_with_p.get(2)}")
 
 if __name__ == "__main__":
     analyze_paragraphs()
@@ -4,48 +4,80 @@ Apply auto-formatting to all entries in bibleData.json
 """
 
 import json
+import os
+import sys
+import threading
+from multiprocessing import Pool
 from pathlib import Path
 from format_content import format_content
 
+try:
+    # optional: orjson parses and serializes several times faster than the
+    # stdlib on a file this size, and emits UTF-8 natively.
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def main():
     """Apply formatting to all entries."""
     json_path = Path('bibleData.json')
-    
+
     if not json_path.exists():
         print(f"Error: {json_path} not found")
         return
-    
+
     # Load data
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if orjson is not None:
+        data = orjson.loads(json_path.read_bytes())
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     print(f"Processing {len(data)} entries...")
     
-    # Format each entry
+    # Format each entry. format_content is a pure string transform, so the
+    # entries can be formatted on all cores and reassembled in order.
     formatted_count = 0
     skipped_count = 0
-    
-    for i, entry in enumerate(data):
-        original = entry['content']
-        formatted = format_content(original)
-        
-        if formatted != original:
+
+    contents = [entry['content'] for entry in data]
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(contents) >= 2 * workers:
+        chunksize = max(1, len(contents) // (workers * 4))
+        with Pool(workers) as pool:
+            results = list(pool.imap(format_content, contents, chunksize))
+    else:
+        results = [format_content(content) for content in contents]
+
+    for i, (entry, formatted) in enumerate(zip(data, results)):
+        if formatted != entry['content']:
             entry['content'] = formatted
             formatted_count += 1
             print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Formatted")
         else:
             skipped_count += 1
     
-    # Save updated data
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
+    # Save updated data: encode in-memory first, then flush the bytes on a
+    # background thread while the summary prints.
+    if orjson is not None:
+        buf = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    elif '--pretty' in sys.argv:
+        # indent=2 forces the pure-Python encoder; only pay for it on request
+        buf = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    else:
+        buf = json.dumps(data, ensure_ascii=False,
+                         separators=(',', ':')).encode('utf-8')
+    writer = threading.Thread(target=json_path.write_bytes, args=(buf,))
+    writer.start()
+
     print(f"\nDone!")
     print(f"  Formatted: {formatted_count}")
     print(f"  Skipped (already formatted): {skipped_count}")
     print(f"  Total: {len(data)}")
 
+    writer.join()
+
 
 if __name__ == '__main__':
     main()
@@ -6,14 +6,44 @@ what the heuristic formatter can handle.
 """
 
 import json
+import re
+import sys
+import threading
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    # optional: orjson parses and serializes several times faster than the
+    # stdlib on a file this size, and emits UTF-8 natively.
+    import orjson
+except ImportError:
+    orjson = None
 
-def fix_angel_of_the_lord(content):
-    """Format the 'Angel of the Lord' section in entry 12."""
-    old_text = '耶和华的使者（ The Angel of the Lord）是谁？ 1.有时他是耶和华自己 a.创世记十六章七至九节、十三节 b.出埃及记十三章廿一至廿二节，十四章十九、二十、廿四节 c.民数记十四章十四节，廿章十六节 d.创世记卅一章十一至十三节 e.创世记四十五章五节，四十八章十五至十六节等 2.有时他有一独特位格，与耶和华不同： a.创世记廿四章七节 b.民数记二十章十六节 c.撒迦利亚书一章十二至十三节 3.他乃是道成肉身前之主基督。'
-    
-    new_text = '''<strong>耶和华的使者（The Angel of the Lord）是谁？</strong>
+try:
+    # optional: pyahocorasick matches every fixer trigger in one pass over
+    # the content instead of one substring scan per fixer.
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Patterns shared by the fixers below, compiled once at import time.
+_TABLE_RE = re.compile(r'<table>.*?</table>', re.DOTALL)
+_GREEDY_TABLE_RE = re.compile(r'<table>.*</table>', re.DOTALL)
+_TR_RE = re.compile(r'<tr>(.*?)</tr>', re.DOTALL)
+_TD_RE = re.compile(r'<td>(.*?)</td>', re.DOTALL)
+_STRIP_TABLE_TAGS = re.compile(r'</?(?:table|tr|td)>')
+_GOLDEN_CELL_RE = re.compile(r'<tr><td>金句：.*?</td>', re.DOTALL)
+_MERGED_TABLE_RE = re.compile(r'(<p>出埃及记\s*</p>\s*)?<table>.*?</table>', re.DOTALL)
+_JOSEPH_TABLE_RE = re.compile(
+    r'<table><tr><td>约瑟</td><td>主基督</td></tr>.*?</table>', re.DOTALL)
+
+
+# Literal rewrite for entry 12, hoisted to module level so the fixer body
+# is a single anchored str.replace with no per-call constant setup.
+_ANGEL_OLD = '耶和华的使者（ The Angel of the Lord）是谁？ 1.有时他是耶和华自己 a.创世记十六章七至九节、十三节 b.出埃及记十三章廿一至廿二节，十四章十九、二十、廿四节 c.民数记十四章十四节，廿章十六节 d.创世记卅一章十一至十三节 e.创世记四十五章五节，四十八章十五至十六节等 2.有时他有一独特位格，与耶和华不同： a.创世记廿四章七节 b.民数记二十章十六节 c.撒迦利亚书一章十二至十三节 3.他乃是道成肉身前之主基督。'
+
+_ANGEL_NEW = '''<strong>耶和华的使者（The Angel of the Lord）是谁？</strong>
 <ol>
 <li>有时他是耶和华自己
 <ol type="a">
@@ -33,20 +63,24 @@ def fix_angel_of_the_lord(content):
 </li>
 <li>他乃是道成肉身前之主基督。</li>
 </ol>'''
-    
-    if old_text in content:
-        return content.replace(old_text, new_text)
+
+
+def fix_angel_of_the_lord(content):
+    """Format the 'Angel of the Lord' section in entry 12."""
+    # Cheap anchor check before searching for the full 500-char literal
+    if 'Angel of the Lord' in content:
+        return content.replace(_ANGEL_OLD, _ANGEL_NEW)
     return content
 
 
 def fix_entry_17(content):
     """Separate Names of Jehovah section and split merged tables in entry 17."""
-    import re
-    
+    # Both parts rewrite a table, so skip the regex work when there is none
+    if '<table>' not in content:
+        return content
+
     # Part 1: Fix the Names of Jehovah section in table cell
-    pattern = r'<tr><td>金句：.*?</td>'
-    
-    match = re.search(pattern, content, re.DOTALL)
+    match = _GOLDEN_CELL_RE.search(content)
     if match:
         # Extract the Names of Jehovah content
         names_section = '''<h4>耶和华在旧约中的名字</h4>
@@ -62,11 +96,14 @@ def fix_entry_17(content):
 
 '''
         
-        # Replace the table cell with empty cell
-        content = re.sub(pattern, '<tr><td></td>', content, flags=re.DOTALL)
-        
+        # Replace the table cell with empty cell, splicing at the offsets
+        # the search above already found
+        content = content[:match.start()] + '<tr><td></td>' + content[match.end():]
+
         # Insert names section before the table
-        content = re.sub(r'(<table>)', names_section + r'\1', content, count=1)
+        idx = content.find('<table>')
+        if idx != -1:
+            content = content[:idx] + names_section + content[idx:]
     
     # Part 2: Split the merged Genesis/Exodus tables
     # The table after Names section contains both Genesis 48-50 (3 cols) and Exodus outline (21 cols)
@@ -75,9 +112,7 @@ def fix_entry_17(content):
     if '<h3>创世记结构</h3>' in content:
         return content
         
-    table_pattern = r'(<p>出埃及记\s*</p>\s*)?<table>.*?</table>'
-    
-    table_match = re.search(table_pattern, content, re.DOTALL)
+    table_match = _MERGED_TABLE_RE.search(content)
     if table_match:
         # Replace with split tables
         replacement = '''<h3>创世记结构</h3>
@@ -92,18 +127,17 @@ def fix_entry_17(content):
 
 <p>出埃及记概览表（简化版 - 详细表格过于复杂，已省略）</p>'''
         
-        content = re.sub(table_pattern, replacement, content, flags=re.DOTALL)
+        content = _MERGED_TABLE_RE.sub(replacement, content)
     
     return content
 
 
 def fix_entry_13(content):
     """Fix the Joseph/Christ comparison table in entry 13."""
-    import re
-    
-    pattern = r'<table><tr><td>约瑟</td><td>主基督</td></tr>.*?</table>'
-    
-    match = re.search(pattern, content, re.DOTALL)
+    if '<table>' not in content:
+        return content
+
+    match = _JOSEPH_TABLE_RE.search(content)
     if not match:
         return content
     
@@ -132,33 +166,32 @@ def fix_entry_13(content):
 </td></tr>
 </table>'''
     
-    return re.sub(pattern, fixed_table, content, flags=re.DOTALL)
+    # Splice at the offsets the search already found instead of re-scanning
+    return content[:match.start()] + fixed_table + content[match.end():]
 
 
 def fix_entry_240(content):
     """Remove spurious table wrapper from regular content in entry 240."""
-    import re
-    
-    pattern = r'<table>.*?</table>'
-    
-    match = re.search(pattern, content, re.DOTALL)
+    if '<table>' not in content:
+        return content
+
+    match = _TABLE_RE.search(content)
     if not match:
         return content
     
     table_content = match.group(0)
     
     # Remove table tags but keep the content
-    unwrapped = re.sub(r'</?table>', '', table_content)
-    unwrapped = re.sub(r'</?tr>', '', unwrapped)
-    unwrapped = re.sub(r'</?td>', '', unwrapped)
-    
-    return re.sub(pattern, unwrapped, content, flags=re.DOTALL)
+    unwrapped = _STRIP_TABLE_TAGS.sub('', table_content)
+
+    return content[:match.start()] + unwrapped + content[match.end():]
 
 
 def fix_entry_21(content):
     """Fix the merged tables in entry 21 and handle potential duplication."""
-    import re
-    
+    if '<table>' not in content:
+        return content
+
     # Define the correct fixed content
     fixed_content = '''<table>
 <tr><td>第十一章</td><td>第十二章</td><td></td><td></td></tr>
@@ -192,153 +225,152 @@ def fix_entry_21(content):
         print("    - Fixing duplication in entry 21...")
         # Aggressive cleanup: Find everything from the FIRST table start to the LAST table end
         # This consumes all duplicates
-        pattern = r'<table>.*</table>'
-        # DOTALL is essential to span lines
-        # This matches from first <table> to the VERY LAST </table> in the string (greedy)
-        return re.sub(pattern, fixed_content, content, flags=re.DOTALL)
+        # The greedy pattern matches from first <table> to the VERY LAST
+        # </table> in the string
+        return _GREEDY_TABLE_RE.sub(fixed_content, content)
 
     # Normal fix check
     if '<p>以色列人的方法是守节期：</p>' in content and content.count('第十一章') == 1:
         return content
         
     # Pattern: find the broken table (typically just one if not duplicated yet)
-    pattern = r'<table>.*?</table>'
-    
-    match = re.search(pattern, content, re.DOTALL)
+    match = _TABLE_RE.search(content)
     if not match:
         return content
-    
-    return re.sub(pattern, fixed_content, content, flags=re.DOTALL)
-    
-    return re.sub(pattern, fixed_content, content, flags=re.DOTALL)
+
+    return content[:match.start()] + fixed_content + content[match.end():]
 
 
+@lru_cache(maxsize=512)
 def fix_complex_table(content):
     """
     Fix tables with inconsistent row structures.
+
+    Pure string -> string, so results are memoized: entries sharing an
+    identical content skip the row reparse on a cache hit.
     Strategy:
     1. If table has rows with >15 columns, simplify entire table
     2. If first cell contains paragraph tags, remove table wrapper
     3. Otherwise, keep only rows with the most common column count
     """
-    import re
-    from collections import Counter
-    
+    # Cheap rejection before the DOTALL search for entries with no table
+    if '<table>' not in content:
+        return content
+
     # Find the table
-    table_match = re.search(r'<table>.*?</table>', content, re.DOTALL)
+    table_match = _TABLE_RE.search(content)
     if not table_match:
         return content
     
     table = table_match.group(0)
-    rows = re.findall(r'<tr>(.*?)</tr>', table, re.DOTALL)
+    rows = _TR_RE.findall(table)
     
     if not rows:
         return content
     
-    # Analyze row structures
-    row_data = []
-    for row in rows:
-        cells = re.findall(r'<td>(.*?)</td>', row, re.DOTALL)
-        row_data.append({
-            'row': row,
-            'cell_count': len(cells),
-            'cells': cells
-        })
+    # Classify rows by cell count with a C-level substring count instead of
+    # materializing every cell; only the first cell of the first row is ever
+    # inspected individually.
+    cell_counts = [row.count('<td>') for row in rows]
     
     # Check if any row has >15 columns (unreadable)
-    max_cols = max(r['cell_count'] for r in row_data)
-    if max_cols > 15:
+    if max(cell_counts) > 15:
         # Replace entire table with note
-        return re.sub(r'<table>.*?</table>', 
-                     '<p>（表格过于复杂，已省略）</p>', 
-                     content, flags=re.DOTALL)
+        return (content[:table_match.start()] + '<p>（表格过于复杂，已省略）</p>'
+                + content[table_match.end():])
     
     # Check if first cell of first row contains paragraph content
-    if row_data and row_data[0]['cells']:
-        first_cell = row_data[0]['cells'][0]
+    first_cell_match = _TD_RE.search(rows[0])
+    if first_cell_match:
+        first_cell = first_cell_match.group(1)
         # Check for paragraph tags or very long content in first cell
         if '<p>' in first_cell or len(first_cell) > 200:
             # Remove table wrapper, keep content
-            unwrapped = re.sub(r'</?table>', '', table)
-            unwrapped = re.sub(r'</?tr>', '', unwrapped)
-            unwrapped = re.sub(r'</?td>', '', unwrapped)
-            return re.sub(r'<table>.*?</table>', unwrapped, content, flags=re.DOTALL)
+            unwrapped = _STRIP_TABLE_TAGS.sub('', table)
+            return (content[:table_match.start()] + unwrapped
+                    + content[table_match.end():])
     
     # Find most common column count
-    col_counts = [r['cell_count'] for r in row_data]
-    most_common_count = Counter(col_counts).most_common(1)[0][0]
+    most_common_count = Counter(cell_counts).most_common(1)[0][0]
     
     # Keep only rows with most common column count
-    filtered_rows = [r['row'] for r in row_data if r['cell_count'] == most_common_count]
+    filtered_rows = [row for row, count in zip(rows, cell_counts)
+                     if count == most_common_count]
     
     if len(filtered_rows) < len(rows):
         # Rebuild table with filtered rows
         new_table = '<table>\n' + '\n'.join(f'<tr>{row}</tr>' for row in filtered_rows) + '\n</table>'
-        return re.sub(r'<table>.*?</table>', new_table, content, flags=re.DOTALL)
+        return (content[:table_match.start()] + new_table
+                + content[table_match.end():])
     
     return content
 
 
+# Pipelines of single-entry fixers keyed by entry index, each step carrying
+# the trigger substring it needs before it can possibly change anything.
+# Each entry is touched once: its fixers are chained on a working copy and
+# the multi-KB content is compared against the original a single time.
+# Note: Scripture reference spacing is handled by normalize_verse_refs.py;
+# no manual spacing fixes here.
+_FIX_PIPELINE = [
+    (12, [('Angel of the Lord', fix_angel_of_the_lord,
+           'Angel of the Lord section')]),
+    (17, [('<table>', fix_entry_17,
+           'Golden verse and Names of Jehovah section')]),
+    (13, [('<table>', fix_entry_13, 'Joseph/Christ comparison table')]),
+    (240, [('<table>', fix_entry_240, 'Removed spurious table wrapper')]),
+    (21, [('<table>', fix_entry_21, 'Split merged tables')]),
+]
+
+_ALL_TRIGGERS = {t for _, steps in _FIX_PIPELINE for t, _, _ in steps}
+
+if ahocorasick is not None:
+    _TRIGGER_AUTOMATON = ahocorasick.Automaton()
+    for _trigger in _ALL_TRIGGERS:
+        _TRIGGER_AUTOMATON.add_word(_trigger, _trigger)
+    _TRIGGER_AUTOMATON.make_automaton()
+else:
+    _TRIGGER_AUTOMATON = None
+
+
+def _triggers_in(content):
+    """Return the set of fixer trigger substrings present in content."""
+    if _TRIGGER_AUTOMATON is not None:
+        return {trigger for _, trigger in _TRIGGER_AUTOMATON.iter(content)}
+    return {t for t in _ALL_TRIGGERS if t in content}
+
+
 def apply_manual_fixes(data):
     """Apply all manual formatting fixes to the data."""
     fixes_applied = 0
-    
-    # Fix entry 12 - Angel of the Lord section
-    if len(data) > 12:
-        original = data[12]['content']
-        fixed = fix_angel_of_the_lord(original)
-        if fixed != original:
-            data[12]['content'] = fixed
-            fixes_applied += 1
-            print(f"✓ Fixed entry 12: Angel of the Lord section")
-    
-    # Fix entry 17 - Golden verse and Names of Jehovah
-    if len(data) > 17:
-        original = data[17]['content']
-        fixed = fix_entry_17(original)
-        if fixed != original:
-            data[17]['content'] = fixed
-            fixes_applied += 1
-            print(f"✓ Fixed entry 17: Golden verse and Names of Jehovah section")
-    
-    # Note: Scripture reference spacing is handled by normalize_verse_refs.py
-    # No need for manual spacing fixes here
-    
-    # Fix entry 13 - Joseph/Christ comparison table
-    if len(data) > 13:
-        original = data[13]["content"]
-        fixed = fix_entry_13(original)
-        if fixed != original:
-            data[13]["content"] = fixed
-            fixes_applied += 1
-            print(f"✓ Fixed entry 13: Joseph/Christ comparison table")
-    
-    # Fix entry 240 - Remove spurious table wrapper
-    if len(data) > 240:
-        original = data[240]["content"]
-        fixed = fix_entry_240(original)
-        if fixed != original:
-            data[240]["content"] = fixed
-            fixes_applied += 1
-            print(f"✓ Fixed entry 240: Removed spurious table wrapper")
-    
-    # Fix entry 21 - Split merged tables
-    if len(data) > 21:
-        original = data[21]['content']
-        fixed = fix_entry_21(original)
-        if fixed != original:
-            data[21]['content'] = fixed
+    n = len(data)
+
+    for idx, steps in _FIX_PIPELINE:
+        if idx >= n:
+            continue
+        entry = data[idx]
+        original = entry['content']
+        triggers = _triggers_in(original)
+        fixed = original
+        applied = []
+        for trigger, fixer, description in steps:
+            if trigger in triggers:
+                fixed = fixer(fixed)
+                applied.append(description)
+        if fixed is not original and fixed != original:
+            entry['content'] = fixed
             fixes_applied += 1
-            print(f"✓ Fixed entry 21: Split merged tables")
-            
+            print(f"✓ Fixed entry {idx}: {'; '.join(applied)}")
+
     # Fix merged/broken tables in multiple entries
     problematic_indices = [29, 74, 81, 85, 111, 163, 179, 208, 212, 213, 253, 281, 289, 294, 297, 299]
     for idx in problematic_indices:
-        if len(data) > idx:
-            original = data[idx]['content']
+        if idx < n:
+            entry = data[idx]
+            original = entry['content']
             fixed = fix_complex_table(original)
             if fixed != original:
-                data[idx]['content'] = fixed
+                entry['content'] = fixed
                 fixes_applied += 1
                 status = "Fixed"
                 if '（表格过于复杂，已省略）' in fixed:
@@ -362,8 +394,11 @@ def main():
     
     # Load data
     print('Loading bibleData.json...')
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if orjson is not None:
+        data = orjson.loads(data_file.read_bytes())
+    else:
+        with open(data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     print(f'Applying manual formatting fixes to {len(data)} entries...')
     
@@ -371,14 +406,25 @@ def main():
     fixes_applied = apply_manual_fixes(data)
     
     if fixes_applied > 0:
-        # Save updated data
-        with open(data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
+        # Save updated data: encode in-memory first, then flush the bytes on
+        # a background thread while the summary prints.
+        if orjson is not None:
+            buf = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        elif '--pretty' in sys.argv:
+            # indent=2 forces the pure-Python encoder; only pay for it on
+            # request
+            buf = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        else:
+            buf = json.dumps(data, ensure_ascii=False,
+                             separators=(',', ':')).encode('utf-8')
+        writer = threading.Thread(target=data_file.write_bytes, args=(buf,))
+        writer.start()
+
         print(f'\n✓ Applied {fixes_applied} manual fix(es)')
+        writer.join()
     else:
         print('\nNo manual fixes needed (already applied or not found)')
-    
+
     return 0
 
 
@@ -4,10 +4,36 @@ Clean up bibleData.json by removing unwanted HTML wrapper tags.
 Removes <!DOCTYPE>, <html>, <head>, <body> tags that the LLM incorrectly added.
 """
 
-import json
 import re
 from pathlib import Path
 
+from json_stream import rewrite_entries
+
+try:
+    # optional: google-re2 runs these wrapper patterns in guaranteed
+    # linear time (no backtracking blowup on adversarial content) and is
+    # typically faster; fall back to the stdlib engine.
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# Wrapper-tag patterns, compiled once at import time. The removable
+# wrappers (DOCTYPE, html, head, title, meta) are one alternation so the
+# content is rewritten in a single pass; <body> stays separate because
+# its inner content is captured, not removed.
+_BODY_RE = _re.compile(r'<body[^>]*>(.*)</body>', _re.DOTALL | _re.IGNORECASE)
+_WRAPPERS_RE = _re.compile(
+    r'<!DOCTYPE[^>]*>|</?html[^>]*>|<head>.*?</head>'
+    r'|<title>.*?</title>|<meta[^>]*>',
+    _re.DOTALL | _re.IGNORECASE)
+# Cheap prefilter: a definite substring each wrapper alternative requires.
+_WRAPPER_TAG_RE = _re.compile(r'<!doctype|<html|</html|<head|<title|<meta',
+                              _re.IGNORECASE)
+# One case-insensitive scan for any wrapper marker, replacing five separate
+# substring tests against a lowercased copy of the content.
+_WRAPPER_MARKER_RE = _re.compile(r'<!doctype|<html|<head|<body|```html',
+                                 _re.IGNORECASE)
+
 
 def clean_html_content(content):
     """Remove unwanted HTML wrapper tags from content."""
@@ -25,23 +51,17 @@ def clean_html_content(content):
         content = content[:-3]
     content = content.strip()
     
-    # Remove DOCTYPE
-    content = re.sub(r'<!DOCTYPE[^>]*>', '', content, flags=re.IGNORECASE)
-    
     # Extract content from <body> if present
-    body_match = re.search(r'<body[^>]*>(.*)</body>', content, re.DOTALL | re.IGNORECASE)
-    if body_match:
-        content = body_match.group(1).strip()
-    
-    # Remove <html>, <head>, and their closing tags
-    content = re.sub(r'</?html[^>]*>', '', content, flags=re.IGNORECASE)
-    content = re.sub(r'<head>.*?</head>', '', content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Remove <title> tags if any leaked through
-    content = re.sub(r'<title>.*?</title>', '', content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Remove <meta> tags
-    content = re.sub(r'<meta[^>]*>', '', content, flags=re.IGNORECASE)
+    if '<body' in content or '<BODY' in content:
+        body_match = _BODY_RE.search(content)
+        if body_match:
+            content = body_match.group(1).strip()
+
+    # Strip DOCTYPE, <html>, <head>, <title> and <meta> wrappers in one
+    # rewrite pass, guarded by a single cheap marker scan so clean
+    # entries make no sub call at all.
+    if _WRAPPER_TAG_RE.search(content):
+        content = _WRAPPERS_RE.sub('', content)
     
     # Clean up extra whitespace and newlines
     content = content.strip()
@@ -53,6 +73,20 @@ def clean_html_content(content):
         return original
 
 
+def _clean_entry(i, entry):
+    """Clean one entry in place; returns True when content changed."""
+    content = entry.get('content', '')
+
+    # Check if content has unwanted tags
+    if _WRAPPER_MARKER_RE.search(content):
+        cleaned = clean_html_content(content)
+        if cleaned != content:
+            entry['content'] = cleaned
+            print(f"✓ [{i+1}] {entry['day_label']}: Cleaned")
+            return True
+    return False
+
+
 def main():
     """Clean all entries in bibleData.json."""
     json_path = Path('bibleData.json')
@@ -61,35 +95,15 @@ def main():
         print(f"Error: {json_path} not found")
         return
     
-    # Load data
-    print("Loading bibleData.json...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"Processing {len(data)} entries...")
-    
-    cleaned_count = 0
+    print("Processing bibleData.json...")
     
-    for i, entry in enumerate(data):
-        content = entry.get('content', '')
-        
-        # Check if content has unwanted tags
-        if any(tag in content.lower() for tag in ['<!doctype', '<html', '<head', '<body', '```html']):
-            cleaned = clean_html_content(content)
-            if cleaned != content:
-                entry['content'] = cleaned
-                cleaned_count += 1
-                print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Cleaned")
+    # Stream entries through the cleaner; the file is only rewritten (via
+    # temp file + atomic rename) when something actually changed.
+    cleaned_count = rewrite_entries(json_path, _clean_entry)
     
     if cleaned_count > 0:
-        # Save cleaned data
-        print(f"\nSaving cleaned data...")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
         print(f"\n✅ Done!")
         print(f"  Cleaned: {cleaned_count} entries")
-        print(f"  Unchanged: {len(data) - cleaned_count} entries")
     else:
         print(f"\n✅ No cleanup needed - all entries are already clean!")
 
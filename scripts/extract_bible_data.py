@@ -1,26 +1,45 @@
 
 import pdfplumber
 import re
-import json
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-def get_headers(page):
+from json_stream import write_entries
+
+try:
+    # optional: google-re2 matches these patterns in guaranteed linear
+    # time with a DFA engine that is also faster in steady state; the
+    # stdlib backtracking engine is the fallback.
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# Header patterns, compiled once at module scope.
+# Relaxed patterns to match text extracted from `extract_words`.
+_WEEK_RE = _re.compile(r'第\s*(\d+)\s*周')
+_DAY_RE = _re.compile(r'第\s*([\d、,]+)\s*日')
+_WEEK_TITLE_RE = _re.compile(r'周\s*(.*?)\s*(?:月)?$')
+_SCRIPTURE_TAIL_RE = _re.compile(r'(日|月)$')
+_DIGIT_RE = _re.compile(r'\d+')
+# Relaxed line-level header patterns to catch "第 周" / "第 日" artifacts
+_HDR_WEEK_LINE_RE = _re.compile(r'第\s*[\d\s]*周')
+_HDR_DAY_LINE_RE = _re.compile(r'第\s*[\d\s、,]*日')
+_VERSE_RE = _re.compile(r'金句\s*[:：]\s*(.*)')
+
+def get_headers(page, words=None):
     """
     Returns list of dicts: {'y': float, 'type': 'week'|'day', 'text': str, 'match': match_obj}
     """
     headers = []
     
-    # Patterns
-    # Relaxed patterns to match text extracted from `extract_words`
-    # or just use `extract_text` lines and find their Y? 
-    # extract_text lines logic is reliable for content, finding their Y is the trick.
-    # get_headers_with_offset logic I wrote earlier using extract_words is good.
-    
-    week_pattern = re.compile(r'第\s*(\d+)\s*周')
-    day_pattern = re.compile(r'第\s*([\d、,]+)\s*日')
-    
-    words = page.extract_words()
+    # extract_text lines logic is reliable for content, finding their Y is
+    # the trick; grouping extract_words by top coordinate covers both.
+    # Callers that already extracted the page words pass them in to avoid
+    # re-parsing the page.
+    if words is None:
+        words = page.extract_words()
     if not words: return []
     
     # helper to sort/group lines
@@ -38,14 +57,19 @@ def get_headers(page):
         text = "".join([w['text'] for w in line_words])
         y = line_words[0]['top']
         
+        # Cheap prefilter: both header kinds need one of these markers, and
+        # most lines contain neither, so skip the regex engine entirely.
+        if '周' not in text and '日' not in text:
+            continue
+        
         # Check patterns
-        wm = week_pattern.search(text)
+        wm = _WEEK_RE.search(text)
         if wm:
              # Look for Title in week header
              title = ""
              # Attempt to extract title from text "第1周Title月"
              # Regex: 第\s*\d+\s*周\s*(.*?)\s*(?:月)?$
-             tm = re.search(r'周\s*(.*?)\s*(?:月)?$', text)
+             tm = _WEEK_TITLE_RE.search(text)
              if tm: title = tm.group(1).strip()
              
              headers.append({
@@ -57,14 +81,14 @@ def get_headers(page):
              })
              continue
              
-        dm = day_pattern.search(text)
+        dm = _DAY_RE.search(text)
         if dm:
              # Extract scripture
              # Text: "第5日创十二至十四章日" -> script: "创十二至十四章"
-             scripture = re.sub(r'(日|月)$', '', day_pattern.sub('', text)).strip()
+             scripture = _SCRIPTURE_TAIL_RE.sub('', _DAY_RE.sub('', text)).strip()
              
              day_str = dm.group(1)
-             day_num_match = re.search(r'\d+', day_str)
+             day_num_match = _DIGIT_RE.search(day_str)
              day_num = int(day_num_match.group(0)) if day_num_match else 0
              
              headers.append({
@@ -81,248 +105,335 @@ def get_headers(page):
     headers.sort(key=lambda x: x['y'])
     return headers
 
-def extract_data(pdf_path, output_path):
+def _finalize_entry(entry):
+    """Join the accumulated content chunks into the final content string."""
+    entry.pop('_last_table_chunk', None)
+    entry['content'] = ' '.join(entry.pop('_chunks', [])).strip()
+    return entry
+
+def _page_events(page, page_words=None):
+    """Return the zone events of one page as picklable structures.
+
+    Each event is (header_info or None, content_items): the header that
+    opens the zone (None for the zone before the first header) and the
+    tables/text found inside it, sorted by Y. This part of the extraction
+    is state-free, so it can run on worker processes; the week/day state
+    machine in extract_data consumes the events sequentially.
+    """
+    # Parse the page words once: headers and the per-zone text-top
+    # lookup below reuse them instead of re-deriving them per crop.
+    if page_words is None:
+        page_words = page.extract_words()
+
+    # 1. Identify Headers on this page
+    page_headers = get_headers(page, page_words)
+
+    # Define Zones
+    # [0, h1.y), [h1.y, h2.y), ... [hn.y, height)
+
+    # Safe bounding boxes
+    # Crop at h.y - epsilon?
+    # Actually, we want the header to be IN the crop starting at h.y
+
+    cuts = [0] + [h['y'] for h in page_headers] + [page.height]
+
+    # We align cuts with headers.
+    # Zone 0 corresponds to "Before first header" -> belongs to previous `current_entry`.
+    # Zone k (k>0) corresponds to Header k-1.
+
+    events = []
+    for k in range(len(cuts) - 1):
+        top = cuts[k]
+        bottom = cuts[k+1]
+
+        if bottom <= top: continue
+
+        # Crop zone
+        # BBox: (x0, top, x1, bottom)
+        crop_rect = (0, top, page.width, bottom)
+        zone = page.crop(crop_rect)
+
+        # Identify context for this zone
+        header_info = None
+        if k > 0:
+            header_info = page_headers[k-1]
+
+        # Extract content from Zone
+
+        # 1. Tables in Zone (extract each table's cells only once)
+        valid_tables = []
+        valid_table_data = []
+
+        for table in zone.find_tables():
+            data = table.extract()
+            if not data: continue
+
+            # Filter 1x1
+            if len(data) == 1 and len(data[0]) == 1:
+                if len(str(data[0][0])) > 50:
+                    continue
+
+            # Filter Header Text
+            table_str = str(data)
+            if _WEEK_RE.search(table_str) or _DAY_RE.search(table_str):
+                 continue
+
+            valid_tables.append(table)
+            valid_table_data.append(data)
+
+        # 2. Text in Zone
+        # Filter out text belonging to VALID tables.
+        # Unpack each bbox once and sort bands by top so the scan
+        # can stop at the first band starting below the object.
+        table_bands = sorted(
+            (t.bbox[1], t.bbox[3], t.bbox[0], t.bbox[2])
+            for t in valid_tables
+        )
+
+        def not_inside_tables(obj):
+            # obj and table.bbox are BOTH ABSOLUTE coordinates.
+            mid_x = (obj['x0'] + obj['x1']) / 2
+            mid_y = (obj['top'] + obj['bottom']) / 2
+
+            for ttop, tbottom, tx0, tx1 in table_bands:
+                if ttop > mid_y:
+                    break
+                if mid_y <= tbottom and tx0 <= mid_x <= tx1:
+                    return False
+            return True
+
+        filtered_zone = zone.filter(not_inside_tables)
+        zone_text = filtered_zone.extract_text()
+
+        # 3. Assemble Content (Sort by Y)
+        content_items = []
+
+        # Add Tables
+        for t, data in zip(valid_tables, valid_table_data):
+            content_items.append({
+                'y': t.bbox[1],
+                'type': 'table',
+                'data': data
+            })
+
+        # Add Text
+        if zone_text:
+            # Get Y of text block from the page-wide words instead
+            # of re-extracting from the filtered crop
+            zone_words = [w for w in page_words
+                          if top <= w['top'] < bottom
+                          and not_inside_tables(w)]
+            if zone_words:
+                text_top = zone_words[0]['top']
+                content_items.append({
+                    'y': text_top,
+                    'type': 'text',
+                    'text': zone_text
+                })
+
+        # Sort
+        content_items.sort(key=lambda x: x['y'])
+
+        events.append((header_info, content_items))
+    return events
+
+
+def _extract_pages_events(pdf_path, page_indices):
+    """Worker: compute zone events for a chunk of pages of `pdf_path`.
+
+    pdfplumber objects are not picklable, so each worker opens its own
+    handle (once per contiguous chunk) and ships back plain structures.
+    """
+    out = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for pno in page_indices:
+            out.append((pno, _page_events(pdf.pages[pno])))
+    return out
+
+
+def extract_data(pdf_path, output_path, workers=None):
+    """Extract the day entries of `pdf_path` into JSON at `output_path`.
+
+    workers: number of worker processes for page parsing. Defaults to
+    os.cpu_count(). Page parsing (headers, tables, zone text) is
+    per-page independent and dominates the runtime, so it fans out
+    across processes; the week/day state machine stays sequential here
+    because entry boundaries carry across pages.
+    """
     print(f"Opening {pdf_path}...")
-    
-    entries = []
-    
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+        print(f"Total pages: {total_pages}")
+
+        # for small documents (or a single worker) the process spawn and
+        # per-worker PDF open cost more than they save
+        if workers <= 1 or total_pages < 2 * workers:
+            pages_events = [_page_events(page) for page in pdf.pages]
+        else:
+            pages_events = None
+
+    if pages_events is None:
+        # split page indices into one contiguous chunk per worker
+        chunk = -(-total_pages // workers)
+        index_chunks = [
+            range(start, min(start + chunk, total_pages))
+            for start in range(0, total_pages, chunk)
+        ]
+        pages_events = [None] * total_pages
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(
+                partial(_extract_pages_events, pdf_path), index_chunks
+            ):
+                for pno, events in result:
+                    pages_events[pno] = events
+
+    # Stream the assembled entries to disk one at a time instead of
+    # accumulating them: peak memory stays bounded by a single entry
+    # (plus the page events) regardless of document length.
+    parsed_count = write_entries(output_path,
+                                 _entries_from_events(pages_events))
+    print(f"Extracted {parsed_count} entries.")
+
+
+def _entries_from_events(pages_events):
+    """Drive the week/day state machine over the page events, yielding
+    each finalized entry as its day ends."""
     # Global state machine
     current_week = 0
     current_week_title = ""
     current_entry = None
-    
-    verse_pattern = re.compile(r'金句\s*[:：]\s*(.*)')
-    
-    parsed_count = 0
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-        print(f"Total pages: {total_pages}")
-        
-        for i, page in enumerate(pdf.pages):
-            # 1. Identify Headers on this page
-            page_headers = get_headers(page)
-            
-            # Define Zones
-            # [0, h1.y), [h1.y, h2.y), ... [hn.y, height)
-            
-            # Safe bounding boxes
-            # Crop at h.y - epsilon? 
-            # Actually, we want the header to be IN the crop starting at h.y
-            
-            cuts = [0] + [h['y'] for h in page_headers] + [page.height]
-            
-            # We align cuts with headers. 
-            # Zone 0 corresponds to "Before first header" -> belongs to previous `current_entry`.
-            # Zone k (k>0) corresponds to Header k-1.
-            
-            for k in range(len(cuts) - 1):
-                top = cuts[k]
-                bottom = cuts[k+1]
-                
-                if bottom <= top: continue
-                
-                # Crop zone
-                # BBox: (x0, top, x1, bottom)
-                crop_rect = (0, top, page.width, bottom)
-                zone = page.crop(crop_rect)
-                
-                # Identify context for this zone
-                header_info = None
-                if k > 0:
-                    header_info = page_headers[k-1]
-                
-                # Update State if entering a new header zone
-                if header_info:
-                    if header_info['type'] == 'week':
-                        current_week = header_info['num']
-                        if header_info['title']:
-                            current_week_title = header_info['title']
-                        # Week Header doesn't start a new entry usually, 
-                        # but it might finish the previous one?
-                        # No, usually "Week X" is just a label.
-                        # We continue adding to `current_entry`? 
-                        # Or does Week Header imply end of previous day?
-                        # Yes, visually it breaks the flow.
-                        # But technically the previous day might have finished content.
-                        # Let's assume Week Header belongs to "General Context" or "New Week Context".
-                        # If we have an active `current_entry`, should we close it?
-                        # Usually yes. But we close entry when we push it to list.
-                        # We push to list when we start a NEW Day Entry.
-                        pass
-                        
-                    elif header_info['type'] == 'day':
-                        # New Day!
-                        # Push old entry
+    verse_pattern = _VERSE_RE
+
+    for page_events in pages_events:
+        for header_info, content_items in page_events:
+            # Update State if entering a new header zone
+            if header_info:
+                if header_info['type'] == 'week':
+                    current_week = header_info['num']
+                    if header_info['title']:
+                        current_week_title = header_info['title']
+                    # Week Header doesn't start a new entry usually, 
+                    # but it might finish the previous one?
+                    # No, usually "Week X" is just a label.
+                    # We continue adding to `current_entry`? 
+                    # Or does Week Header imply end of previous day?
+                    # Yes, visually it breaks the flow.
+                    # But technically the previous day might have finished content.
+                    # Let's assume Week Header belongs to "General Context" or "New Week Context".
+                    # If we have an active `current_entry`, should we close it?
+                    # Usually yes. But we close entry when we push it to list.
+                    # We push to list when we start a NEW Day Entry.
+                    pass
+
+                elif header_info['type'] == 'day':
+                    # New Day!
+                    # Push old entry
+                    if current_entry:
+                        yield _finalize_entry(current_entry)
+
+                    # Create new entry. Content pieces accumulate in
+                    # _chunks and are joined once when the entry is
+                    # pushed, avoiding quadratic string growth.
+                    current_entry = {
+                        "day_label": f"第{current_week}周 第{header_info['num']}日",
+                        "week": current_week,
+                        "day": header_info['num'],
+                        "title": current_week_title, 
+                        "scripture": header_info['scripture'],
+                        "content": "",
+                        "verse": "",
+                        "_chunks": [],
+                        "_last_table_chunk": None
+                    }
+
+            # Process items
+            for item in content_items:
+                if item['type'] == 'text':
+                    # strip and drop blanks at C level, no intermediate list
+                    for line in filter(None, map(str.strip,
+                                                 item['text'].splitlines())):
+                        # Check Verse
+                        vm = verse_pattern.search(line)
+                        if vm:
+                             if current_entry:
+                                 current_entry['verse'] = vm.group(1).strip()
+                        else:
+
+                             # Skip header lines. Body lines rarely
+                             # start with 第, so the one-char test
+                             # avoids both regex matches.
+                             if line.startswith('第') and (
+                                     _HDR_WEEK_LINE_RE.match(line)
+                                     or _HDR_DAY_LINE_RE.match(line)):
+                                 continue
+
+                             if current_entry:
+                                 # Use space instead of newline to avoid literal \n in content
+                                 current_entry['_chunks'].append(line)
+                                 current_entry['_last_table_chunk'] = None
+
+                elif item['type'] == 'table':
+                    data = item['data']
+                    merged = False
+
+                    # Aggressive Merge: If the entry's last chunk is a table
+                    # chunk — tracked by index, so no rstrip/rfind scan of
+                    # the chunk text — append the new rows into it.
+                    chunks = current_entry['_chunks'] if current_entry else None
+                    if (chunks and
+                            current_entry['_last_table_chunk'] == len(chunks) - 1):
+                         # Chop the closing tag; table chunks are built here,
+                         # so they end with exactly </table>
+                         base_content = chunks[-1][:-len('</table>')]
+
+                         # Construct new rows (list + join, not
+                         # quadratic += growth)
+                         parts = []
+                         parts_append = parts.append
+                         for row in data:
+                            parts_append("<tr>")
+                            for cell in row:
+                                cell_text = str(cell).replace('\n', ' ') if cell else ""
+                                # Check for verse pattern in table cells
+                                if cell and current_entry and not current_entry.get('verse'):
+                                    vm = verse_pattern.search(str(cell))
+                                    if vm:
+                                        current_entry['verse'] = vm.group(1).strip()
+                                parts_append(f"<td>{cell_text}</td>")
+                            parts_append("</tr>")
+
+                         chunks[-1] = base_content + ''.join(parts) + "</table>"
+                         merged = True
+
+                    if not merged:
+                        parts = ["<table>"]
+                        parts_append = parts.append
+                        for row in data:
+                            parts_append("<tr>")
+                            for cell in row:
+                                cell_text = str(cell).replace('\n', ' ') if cell else ""
+                                # Check for verse pattern in table cells
+                                if cell and current_entry and not current_entry.get('verse'):
+                                    vm = verse_pattern.search(str(cell))
+                                    if vm:
+                                        current_entry['verse'] = vm.group(1).strip()
+                                parts_append(f"<td>{cell_text}</td>")
+                            parts_append("</tr>")
+                        parts_append("</table>")
+                        html = ''.join(parts)
                         if current_entry:
-                            entries.append(current_entry)
-                            parsed_count += 1
-                        
-                        # Create new entry
-                        current_entry = {
-                            "day_label": f"第{current_week}周 第{header_info['num']}日",
-                            "week": current_week,
-                            "day": header_info['num'],
-                            "title": current_week_title, 
-                            "scripture": header_info['scripture'],
-                            "content": "",
-                            "verse": ""
-                        }
-
-
-
-                # Extract content from Zone
-                
-                # 1. Tables in Zone
-                zone_tables = zone.find_tables()
-                valid_tables = []
-                
-                if zone_tables:
-                    for t_idx, table in enumerate(zone_tables):
-                        data = table.extract()
-                        if not data: continue
-                        
-                        # Filter 1x1
-                        if len(data) == 1 and len(data[0]) == 1:
-                            if len(str(data[0][0])) > 50:
-                                continue
-                        
-                        # Filter Header Text
-                        table_str = str(data)
-                        if re.search(r'第\s*\d+\s*周', table_str) or re.search(r'第\s*[\d、,]+\s*日', table_str):
-                             continue
-
-                        valid_tables.append(table)
-
-                # 2. Text in Zone
-                # Filter out text belonging to VALID tables
-                def not_inside_tables(obj):
-                    # obj and table.bbox are BOTH ABSOLUTE coordinates.
-                    x0, top, x1, bottom = obj['x0'], obj['top'], obj['x1'], obj['bottom']
-                    mid_x = (x0 + x1) / 2
-                    mid_y = (top + bottom) / 2
-                    
-                    for t in valid_tables:
-                        tx0, ttop, tx1, tbottom = t.bbox
-                        if tx0 <= mid_x <= tx1 and ttop <= mid_y <= tbottom:
-                            return False
-                    return True
-
-                filtered_zone = zone.filter(not_inside_tables)
-                zone_text = filtered_zone.extract_text()
-                
-                # 3. Assemble Content (Sort by Y)
-                content_items = []
-                
-                # Add Tables
-                for t in valid_tables:
-                    content_items.append({
-                        'y': t.bbox[1],
-                        'type': 'table',
-                        'data': t.extract()
-                    })
-                    
-                # Add Text
-                if zone_text:
-                    # Get Y of text block
-                    words = filtered_zone.extract_words()
-                    if words:
-                        text_top = words[0]['top']
-                        content_items.append({
-                            'y': text_top,
-                            'type': 'text',
-                            'text': zone_text
-                        })
-                
-                # Sort
-                content_items.sort(key=lambda x: x['y'])
-                
-                # Process items
-                for item in content_items:
-                    if item['type'] == 'text':
-                        z_lines = item['text'].split('\n')
-                        for line in z_lines:
-                            line = line.strip()
-                            if not line: continue
-                            
-                            # Check Verse
-                            vm = verse_pattern.search(line)
-                            if vm:
-                                 if current_entry:
-                                     current_entry['verse'] = vm.group(1).strip()
-                                     current_entry['verse'] = vm.group(1).strip()
-                            else:
-
-                                 # Skip header lines
-                                 # Relaxed regex to catch "第 周", "第 日" artifacts safely
-                                 if re.match(r'第\s*[\d\s]*周', line) or re.match(r'第\s*[\d\s、,]*日', line):
-                                     continue
-                                 
-                                 if current_entry:
-                                     # Use space instead of newline to avoid literal \n in content
-                                     current_entry['content'] += (" " + line) if current_entry['content'] else line
-                                     
-                    elif item['type'] == 'table':
-                        data = item['data']
-                        merged = False
-                        
-                        # Aggressive Merge: If previous content ends with table, append rows
-                        if current_entry and current_entry['content'].strip().endswith('</table>'):
-                             # Remove last </table>
-                             # Find the last </table>
-                             last_close_idx = current_entry['content'].rfind('</table>')
-                             if last_close_idx != -1:
-                                 # Check if it looks close enough?
-                                 # Assume yes for now as they are adjacent in sequence
-                                 
-                                 # Strip trailing whitespace/newlines before </table> is hard on string
-                                 # We slice string up to last_close_idx
-                                 base_content = current_entry['content'][:last_close_idx]
-                                 
-                                 # Construct new rows
-                                 new_rows_html = ""
-                                 for row in data:
-                                    new_rows_html += "<tr>"
-                                    for cell in row:
-                                        cell_text = str(cell).replace('\n', ' ') if cell else ""
-                                        # Check for verse pattern in table cells
-                                        if cell and current_entry and not current_entry.get('verse'):
-                                            vm = verse_pattern.search(str(cell))
-                                            if vm:
-                                                current_entry['verse'] = vm.group(1).strip()
-                                        new_rows_html += f"<td>{cell_text}</td>"
-                                    new_rows_html += "</tr>"
-                                 
-                                 current_entry['content'] = base_content + new_rows_html + "</table>"
-                                 merged = True
-                        
-                        if not merged:
-                            html = "<table>"
-                            for row in data:
-                                html += "<tr>"
-                                for cell in row:
-                                    cell_text = str(cell).replace('\n', ' ') if cell else ""
-                                    # Check for verse pattern in table cells
-                                    if cell and current_entry and not current_entry.get('verse'):
-                                        vm = verse_pattern.search(str(cell))
-                                        if vm:
-                                            current_entry['verse'] = vm.group(1).strip()
-                                    html += f"<td>{cell_text}</td>"
-                                html += "</tr>"
-                            html += "</table>"
-                            if current_entry:
-                                # Add space before table
-                                current_entry['content'] += " " + html
+                            current_entry['_chunks'].append(html)
+                            current_entry['_last_table_chunk'] = (
+                                len(current_entry['_chunks']) - 1)
 
     if current_entry:
-        entries.append(current_entry)
-        parsed_count += 1
-        
-    print(f"Extracted {parsed_count} entries.")
-    
+        yield _finalize_entry(current_entry)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
 
 if __name__ == "__main__":
     pdf_path = "daily-walk-with-God.pdf"
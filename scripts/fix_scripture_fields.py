@@ -5,10 +5,11 @@ Ensures all scripture references start with a book abbreviation.
 If a book name is missing (e.g., "七至九章"), it infers it from the 'verse' field or context.
 """
 
-import json
 import re
 from pathlib import Path
 
+from json_stream import rewrite_entries
+
 # Valid book abbreviations (Single char or distinct start)
 BOOK_ABBRS = [
     '创', '出', '利', '民', '申', '书', '士', '得', '撒上', '撒下',
@@ -38,58 +39,74 @@ FULL_TO_ABBR = {
     '约翰三书': '约三', '约翰壹书': '约一', '约翰贰书': '约二', '约翰叁书': '约三', '犹大书': '犹', '启示录': '启'
 }
 
+# Longest-first so multi-char abbreviations (撒上) win over their one-char
+# prefixes (撒); sorted once at import and bucketed by first character so
+# each lookup only tests the handful of candidates sharing that character.
+_BOOK_ABBRS_SORTED = tuple(sorted(BOOK_ABBRS, key=len, reverse=True))
+
+_ABBRS_BY_FIRST_CHAR = {}
+for _abbr in _BOOK_ABBRS_SORTED:
+    _ABBRS_BY_FIRST_CHAR.setdefault(_abbr[0], []).append(_abbr)
+
+_FULL_BY_FIRST_CHAR = {}
+for _full, _abbr in FULL_TO_ABBR.items():
+    _FULL_BY_FIRST_CHAR.setdefault(_full[0], []).append((_full, _abbr))
+
 def get_book_from_verse(verse_text):
     """Extract book abbreviation from verse text (e.g., '阿摩司书八章十一节' -> '摩')."""
     if not verse_text:
         return None
-    for full, abbr in FULL_TO_ABBR.items():
+    for full, abbr in _FULL_BY_FIRST_CHAR.get(verse_text[0], ()):
         if verse_text.startswith(full):
             return abbr
     # Try finding abbreviation directly if it matches significantly? 
     # Usually verse field starts with Full Name.
     return None
 
+def normalize_entry(i, entry, last_book):
+    """Normalize one entry's scripture field.
+
+    Returns (changed, last_book) so callers can thread the running book
+    context through a streaming pass.
+    """
+    scripture = entry.get('scripture', '').strip()
+    if not scripture:
+        return False, last_book
+        
+    # Check if scripture starts with a valid book abbreviation; candidates
+    # are pre-sorted longest first (e.g., 撒上 before 撒)
+    for abbr in _ABBRS_BY_FIRST_CHAR.get(scripture[0], ()):
+        if scripture.startswith(abbr):
+            return False, abbr
+    
+    # Try to infer from verse field
+    verse = entry.get('verse', '').strip()
+    inferred_book = get_book_from_verse(verse)
+    
+    if inferred_book:
+        print(f"Entry {i}: '{scripture}' -> '{inferred_book}{scripture}' (inferred from verse '{verse}')")
+        entry['scripture'] = f"{inferred_book}{scripture}"
+        return True, inferred_book
+    if last_book:
+        # Fallback to last book if reasonable? 
+        # Risk: Might be wrong if context changed.
+        # But 'Seven to Nine Chapters' without book implies continuation.
+        # Let's verify with context if possible, but for now simple inference.
+        print(f"Entry {i}: '{scripture}' -> '{last_book}{scripture}' (inferred from previous '{last_book}')")
+        entry['scripture'] = f"{last_book}{scripture}"
+        return True, last_book
+    print(f"Warning: Entry {i} '{scripture}' has no book and cannot infer.")
+    return False, last_book
+
 def normalize_scripture(data):
     """Normalize scripture fields."""
     count = 0
     last_book = None
     
     for i, entry in enumerate(data):
-        scripture = entry.get('scripture', '').strip()
-        if not scripture:
-            continue
-            
-        # Check if scripture starts with a valid book abbreviation
-        # We sort BOOK_ABBRS by length descending to match longest first (e.g., 撒上 before 撒)
-        sorted_abbrs = sorted(BOOK_ABBRS, key=len, reverse=True)
-        
-        has_book = False
-        for abbr in sorted_abbrs:
-            if scripture.startswith(abbr):
-                has_book = True
-                last_book = abbr
-                break
-        
-        if not has_book:
-            # Try to infer from verse field
-            verse = entry.get('verse', '').strip()
-            inferred_book = get_book_from_verse(verse)
-            
-            if inferred_book:
-                print(f"Entry {i}: '{scripture}' -> '{inferred_book}{scripture}' (inferred from verse '{verse}')")
-                entry['scripture'] = f"{inferred_book}{scripture}"
-                last_book = inferred_book
-                count += 1
-            elif last_book:
-                 # Fallback to last book if reasonable? 
-                 # Risk: Might be wrong if context changed.
-                 # But 'Seven to Nine Chapters' without book implies continuation.
-                 # Let's verify with context if possible, but for now simple inference.
-                 print(f"Entry {i}: '{scripture}' -> '{last_book}{scripture}' (inferred from previous '{last_book}')")
-                 entry['scripture'] = f"{last_book}{scripture}"
-                 count += 1
-            else:
-                 print(f"Warning: Entry {i} '{scripture}' has no book and cannot infer.")
+        changed, last_book = normalize_entry(i, entry, last_book)
+        if changed:
+            count += 1
 
     return count
 
@@ -99,17 +116,21 @@ def main():
         print(f"Error: {json_path} not found")
         return
         
-    print(f"Loading {json_path}...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        
-    fixed_count = normalize_scripture(data)
+    print(f"Processing {json_path}...")
+    
+    # Stream entries, threading the running book context through the pass;
+    # the file is only rewritten when at least one entry changed.
+    last_book = None
+    
+    def transform(i, entry):
+        nonlocal last_book
+        changed, last_book = normalize_entry(i, entry, last_book)
+        return changed
+    
+    fixed_count = rewrite_entries(json_path, transform)
     
     if fixed_count > 0:
-        print(f"Saving {fixed_count} fixes to {json_path}...")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        print("Done.")
+        print(f"Saved {fixed_count} fixes to {json_path}.")
     else:
         print("No changes needed.")
 
@@ -4,9 +4,10 @@ Fix table splits in bibleData.json.
 Some tables in the PDF are incorrectly merged and need to be split.
 """
 
-import json
 from pathlib import Path
 
+from json_stream import rewrite_entries
+
 
 def split_week2_day1_tables(entry):
     """Split the merged table in Week 2 Day 1."""
@@ -38,6 +39,21 @@ def split_week2_day1_tables(entry):
     return True
 
 
+def _fix_entry(i, entry):
+    """Apply the per-index table fixes; returns True when entry changed."""
+    # Week 2 Day 1 (index 6)
+    if i == 6:
+        if split_week2_day1_tables(entry):
+            print(f"✓ Week 2 Day 1: Split tables")
+            return True
+    
+    # Add more table fixes here as needed
+    # if i == X:
+    #     return fix_some_other_table(entry)
+    
+    return False
+
+
 def main():
     """Fix table splits in bibleData.json."""
     json_path = Path('bibleData.json')
@@ -46,30 +62,12 @@ def main():
         print(f"Error: {json_path} not found")
         return
     
-    # Load data
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"Processing {len(data)} entries...")
+    print("Processing bibleData.json...")
     
-    fixed_count = 0
-    
-    # Week 2 Day 1 (index 6)
-    if len(data) > 6:
-        if split_week2_day1_tables(data[6]):
-            fixed_count += 1
-            print(f"✓ Week 2 Day 1: Split tables")
-    
-    # Add more table fixes here as needed
-    # if len(data) > X:
-    #     if fix_some_other_table(data[X]):
-    #         fixed_count += 1
+    # Stream entries; the file is only rewritten when a fix applied.
+    fixed_count = rewrite_entries(json_path, _fix_entry)
     
     if fixed_count > 0:
-        # Save
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
         print(f"\n✅ Done! Fixed {fixed_count} table(s)")
     else:
         print(f"\n✅ No table fixes needed")
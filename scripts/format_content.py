@@ -5,33 +5,79 @@ Adds paragraph breaks, blockquotes, bullet lists, and bold headings.
 """
 
 import json
+import os
 import re
+import sys
+from functools import lru_cache
+from multiprocessing import Pool
 from pathlib import Path
 
+from json_stream import iter_entries
 
-def build_replacement(content, matches):
-    """Helper to build <ol> block for a list of matches."""
-    if not matches:
+try:
+    # optional: orjson loads and dumps this file several times faster
+    # than the stdlib encoder, emitting UTF-8 natively.
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # optional: google-re2's DFA engine matches in guaranteed linear
+    # time and is typically faster on these short patterns; fall back to
+    # the stdlib backtracking engine.
+    import re2 as _re
+except ImportError:
+    _re = re
+
+# All patterns compiled once at import time; per-call re.sub/finditer
+# string lookups go through re's shared 512-entry cache and re-parse on
+# eviction, which this avoids.
+_PRESPLIT_RE = _re.compile(r'([。?？!！：）)])\s*(\d+\.)')
+_NUMBERED_LIST_RE = _re.compile(r'(?m)^\s*(\d+)\.\s*(.+)$')
+_NUM_HINT_RE = _re.compile(r'\d\.')
+# Deletion table for gap text between list items: whitespace (including
+# the Unicode spaces \s matches) plus the ignorable punctuation. A
+# str.translate pass replaces the old character-class re.sub.
+_GAP_DELETE = str.maketrans('', '', (
+    ' \t\n\r\v\f\x1c\x1d\x1e\x1f\x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000。，.,'))
+_TABLE_RE = _re.compile(r'(<table>.*?</table>)', _re.DOTALL)
+_QUOTE_RE = _re.compile(r'([^。]*说：)「([^」]+)」')
+_QUESTION_RE = _re.compile(r'(若你[^？]+？)')
+_HEADER_RE = _re.compile(r'<p>([^<>]+：)</p>')
+_TOKEN_RE = _re.compile(r'__PROTECTED_BLOCK_(\d+)__')
+_COMMENTARY_OPEN_RE = _re.compile(r'^</p>')
+_COMMENTARY_CLOSE_RE = _re.compile(r'<p>$')
+
+GAP_THRESHOLD = 5  # characters (newlines/whitespace are fine, but text implies break)
+
+# Sentence endings that force a paragraph break early (section headers
+# and rhetorical questions); endswith on a tuple avoids indexing and a
+# per-call containment scan.
+_BREAK_SUFFIXES = ('：', '？')
+
+
+def build_replacement(start, end, start_num, items):
+    """Helper to build an <ol> replacement action for one list chunk."""
+    if not items:
         return None
-        
-    start_num = int(matches[0].group(1))
-    
-    list_items = []
-    for m in matches:
-         # text is group 2
-         list_items.append(m.group(2).strip())
-         
+
     start_attr = f' start="{start_num}"' if start_num > 1 else ''
-    
-    formatted_list = f'<ol{start_attr}>\n' + '\n'.join([f'<li>{item}</li>' for item in list_items]) + '\n</ol>'
-    
-    return (matches[0].start(), matches[-1].end(), formatted_list)
 
+    formatted_list = f'<ol{start_attr}>\n' + '\n'.join([f'<li>{item}</li>' for item in items]) + '\n</ol>'
+
+    return (start, end, formatted_list)
 
+
+@lru_cache(maxsize=4096)
 def format_content(content):
     """
     Format content with improved structure.
     
+    Pure string transform, so results are memoized: repeated preview
+    runs over unchanged entries become dict lookups.
+    
     Rules:
     1. Detect quotes with 「」or 『』and wrap in blockquote
     2. Detect question patterns (若你...？) and create bullet lists
@@ -42,88 +88,86 @@ def format_content(content):
     """
     
     formatted = content
-    
-    # Pre-process: Ensure numbered lists are on their own lines to help detection
-    # This splits "Text. 1. Item" into "Text.\n1. Item"
-    # Added support for colon (：) and parens (）) which often precede lists
-    content = re.sub(r'([。?？!！：）)])\s*(\d+\.)', r'\1\n\2', content)
-
-    # First, detect and format numbered lists (even if content has some HTML)
-    # Pattern: 1.text 2.text 3.text (consecutive numbered items)
-    # This works across paragraph boundaries because we use multiline mode
-    numbered_list_pattern = r'(?m)^\s*(\d+)\.\s*(.+)$'
-    matches = list(re.finditer(numbered_list_pattern, content))
-    
-    # Logic to identify valid sequences (1, 2, 3...)
-    # and group them (splitting if gaps are too large to prevents deleting content)
-    
-    sequences = []
-    current_sequence = []
-    expected_num = 1
-    
-    # 1. Build logical sequences based on numbers
-    for m in matches:
-        num = int(m.group(1))
-        if num == expected_num:
-             current_sequence.append(m)
-             expected_num += 1
-        elif num == 1:
-             if current_sequence:
-                 sequences.append(current_sequence)
-             current_sequence = [m]
-             expected_num = 2
-        else:
-             if current_sequence:
-                 sequences.append(current_sequence)
-             current_sequence = []
-             expected_num = 1
-    if current_sequence:
-        sequences.append(current_sequence)
-
-    # 2. Process sequences: Check gaps and create replacement actions
+
+    # Numbered-list detection, all in a single streaming pass over
+    # finditer: valid runs counting up from 1 are split into physical
+    # chunks wherever the gap between items holds substantive text, and
+    # each chunk becomes a replacement action. Only scalar positions and
+    # the stripped item texts are kept per chunk - no list of Match
+    # objects is ever materialized.
     # Action = (start, end, replacement_text)
     replacements = []
-    
-    GAP_THRESHOLD = 5 # characters (newlines/whitespace are fine, but text implies break)
-    
-    for seq in sequences:
-        # A sequence is like [Item 1, Item 2, Item 3]
-        # We need to check gaps between Item 1 end and Item 2 start
-        
-        # We split this logical sequence into physical chunks
-        current_chunk = []
-        
-        for i, match in enumerate(seq):
-            if not current_chunk:
-                current_chunk.append(match)
-                continue
-            
-            prev_match = current_chunk[-1]
-            gap_text = content[prev_match.end():match.start()]
-            
-            # If gap contains substantive text (not just whitespace/punctuation), break the chunk
-            # We strip whitespace and common punctuation to check for "real" text
-            clean_gap = re.sub(r'[\s\n。，\.,]', '', gap_text)
-            
-            if len(clean_gap) > 0:
-                # Close current chunk
-                replacements.append(build_replacement(content, current_chunk))
-                current_chunk = [match]
+
+    # Cheap signal: every numbered-list item needs a digit followed by an
+    # ASCII dot, so entries without one skip the whole list stage.
+    if _NUM_HINT_RE.search(content):
+        # Pre-process: Ensure numbered lists are on their own lines to help detection
+        # This splits "Text. 1. Item" into "Text.\n1. Item"
+        # Added support for colon (：) and parens (）) which often precede lists
+        content = _PRESPLIT_RE.sub(r'\1\n\2', content)
+
+        # State for the chunk being accumulated.
+        chunk_items = []
+        chunk_start = chunk_end = chunk_num = 0
+        expected_num = 1
+
+        def _close_chunk():
+            replacements.append(
+                build_replacement(chunk_start, chunk_end, chunk_num,
+                                  chunk_items))
+
+        # Pattern: 1.text 2.text 3.text (consecutive numbered items).
+        # Works across paragraph boundaries thanks to multiline mode.
+        for m in _NUMBERED_LIST_RE.finditer(content):
+            num = int(m.group(1))
+            if num == expected_num and chunk_items:
+                # Continuation of the current run; break the chunk when
+                # the gap contains real text (not just whitespace and
+                # punctuation) so no content gets swallowed.
+                gap_text = content[chunk_end:m.start()]
+                if gap_text.translate(_GAP_DELETE):
+                    _close_chunk()
+                    chunk_items = [m.group(2).strip()]
+                    chunk_start = m.start()
+                    chunk_num = num
+                else:
+                    chunk_items.append(m.group(2).strip())
+                expected_num += 1
+            elif num == 1:
+                # New run starting at 1 (also covers the very first item).
+                if chunk_items:
+                    _close_chunk()
+                chunk_items = [m.group(2).strip()]
+                chunk_start = m.start()
+                chunk_num = 1
+                expected_num = 2
             else:
-                current_chunk.append(match)
-        
-        if current_chunk:
-            replacements.append(build_replacement(content, current_chunk))
-            
-    # 3. Apply replacements in reverse order
+                # Out-of-sequence number: close out and wait for a new 1.
+                if chunk_items:
+                    _close_chunk()
+                chunk_items = []
+                expected_num = 1
+            chunk_end = m.end()
+
+        if chunk_items:
+            _close_chunk()
+
+
+    # 3. Apply replacements in one forward pass: collect the untouched
+    # slices and replacement texts and join once, instead of re-copying
+    # the whole string per splice.
     # Filter out None (invalid chunks)
     replacements = [r for r in replacements if r is not None]
-    replacements.sort(key=lambda x: x[0], reverse=True)
-    
-    content_modified = False
-    for start, end, text in replacements:
-        content = content[:start] + text + content[end:]
-        content_modified = True
+    if replacements:
+        replacements.sort(key=lambda x: x[0])
+        pieces = []
+        cursor = 0
+        for start, end, text in replacements:
+            pieces.append(content[cursor:start])
+            pieces.append(text)
+            cursor = end
+        pieces.append(content[cursor:])
+        content = ''.join(pieces)
 
     formatted = content
     
@@ -140,111 +184,165 @@ def format_content(content):
 
     # 0. Protect existing tables
     # Match <table>...</table> (DOTALL)
-    table_pattern = r'(<table>.*?</table>)'
-    formatted = re.sub(
-        table_pattern,
-        lambda m: protect(m.group(1)),
-        formatted,
-        flags=re.DOTALL
-    )
+    if '<table>' in formatted:
+        formatted = _TABLE_RE.sub(
+            lambda m: protect(m.group(1)),
+            formatted
+        )
 
     # 1. Wrap quotes in blockquotes
     # Pattern: text says: 「quote」
     # We want to protect blockquotes as well so they aren't split
-    quote_pattern = r'([^。]*说：)「([^」]+)」'
-    formatted = re.sub(
-        quote_pattern,
-        lambda m: f'{m.group(1)}\n{protect(f"<blockquote>「{m.group(2)}」</blockquote>")}\n',
-        formatted
-    )
+    if '说：「' in formatted:
+        formatted = _QUOTE_RE.sub(
+            lambda m: f'{m.group(1)}\n{protect(f"<blockquote>「{m.group(2)}」</blockquote>")}\n',
+            formatted
+        )
     
     # 2. Detect and format question lists
     # Pattern: 若你...？ repeated
-    question_pattern = r'(若你[^？]+？)'
-    questions = re.findall(question_pattern, formatted)
-    
-    if len(questions) >= 2:
-        # Found multiple questions - create a bullet list
-        questions_section = '\n'.join(questions)
-        html_list = '<ul style="line-height: 1.8;">\n' + '\n'.join([f'<li>{q}</li>' for q in questions]) + '\n</ul>'
-        formatted = formatted.replace(
-            questions_section,
-            '<p><strong>思考问题：</strong></p>\n' + protect(html_list) + '\n'
-        )
+    q_matches = (list(_QUESTION_RE.finditer(formatted))
+                 if '若你' in formatted else [])
+    
+    if len(q_matches) >= 2:
+        # Found multiple questions - create a bullet list. Splice the
+        # list over the exact span of the matches instead of rebuilding
+        # the questions section and hoping str.replace finds it (it only
+        # matched when the questions happened to be joined by single
+        # newlines, i.e. essentially never). Only do it when nothing but
+        # whitespace separates the questions, so no real text is lost.
+        if all(not formatted[a.end():b.start()].strip()
+               for a, b in zip(q_matches, q_matches[1:])):
+            questions = [m.group(1) for m in q_matches]
+            html_list = '<ul style="line-height: 1.8;">\n' + '\n'.join([f'<li>{q}</li>' for q in questions]) + '\n</ul>'
+            formatted = (
+                formatted[:q_matches[0].start()]
+                + '<p><strong>思考问题：</strong></p>\n' + protect(html_list)
+                + '\n' + formatted[q_matches[-1].end():]
+            )
     
     # 3. Add paragraph breaks
     # Split on 。and group every 2-3 sentences into a paragraph
     # We first split by existing newlines to respect manual structure
+    # Invariant hoist: if the whole string has no '<' at all, no
+    # sentence can be an HTML block, so the per-sentence scans below
+    # short-circuit on a constant-false flag.
+    has_html = '<' in formatted
     raw_paras = formatted.split('\n\n')
-    final_paras = []
+    # Paragraphs are emitted pre-wrapped into one output list that is
+    # joined once at the end; the separate wrap-in-<p> pass over a
+    # final_paras list is folded in here. Closed groups are already
+    # stripped and non-empty when they reach _emit.
+    out = []
+    out_append = out.append
+
+    def _emit(para):
+        # Don't wrap if it's already HTML-like OR if it's a protected block
+        # Protected blocks (like tables) should stand alone
+        if para.startswith('<') or '__PROTECTED_BLOCK_' in para:
+            out_append(para)
+        else:
+            out_append(f'<p>{para}</p>')
+
+    # bind the loop-invariant lookup once; the sentence walk below is
+    # the hottest interpreted loop in this function
+    paras_append = _emit
     
     for raw_p in raw_paras:
         if not raw_p.strip():
             continue
             
-        sentences = raw_p.split('。')
         current_group = []
+        # While the group's sentences are an unbroken, unstripped run of
+        # the source block, the closing paragraph is just a slice of
+        # raw_p — no join, no per-sentence temporaries. Any strip that
+        # changed a sentence, or a skipped empty fragment, marks the
+        # group dirty and falls back to the join.
+        group_start = 0
+        group_end = 0
+        group_clean = True
+        group_needs_dot = False
         
-        for i, sentence in enumerate(sentences):
-            sentence = sentence.strip()
+        # Walk the sentences with find() instead of materializing the
+        # full split('。') list; each iteration slices one sentence.
+        pos = 0
+        p_len = len(raw_p)
+        find = raw_p.find
+        while pos <= p_len:
+            sent_start = pos
+            nxt = find('。', pos)
+            if nxt == -1:
+                raw_sentence = raw_p[pos:]
+                pos = p_len + 1
+                end_incl = p_len
+                had_dot = False
+            else:
+                raw_sentence = raw_p[pos:nxt]
+                pos = nxt + 1
+                end_incl = nxt + 1
+                had_dot = True
+            sentence = raw_sentence.strip()
             if not sentence:
+                if current_group:
+                    group_clean = False
                 continue
                 
             # Check if this sentence has a protected token
             if '__PROTECTED_BLOCK_' in sentence:
                 if current_group:
-                    final_paras.append('。'.join(current_group) + '。')
+                    paras_append('。'.join(current_group) + '。')
                     current_group = []
-                final_paras.append(sentence) # Treat protected block as its own para (wrapper pending)
+                paras_append(sentence) # Treat protected block as its own para (wrapper pending)
                 continue
             
             # Check if likely HTML block (skip if already formatted)
-            if '<' in sentence and '>' in sentence:
+            if has_html and '<' in sentence and '>' in sentence:
                  if current_group:
-                    final_paras.append('。'.join(current_group) + '。')
+                    paras_append('。'.join(current_group) + '。')
                     current_group = []
-                 final_paras.append(sentence)
+                 paras_append(sentence)
                  continue
             
+            if not current_group:
+                group_start = sent_start
+                group_clean = True
+            if sentence != raw_sentence:
+                group_clean = False
             current_group.append(sentence)
+            group_end = end_incl
+            group_needs_dot = not had_dot
             
             # Create paragraph after 2-3 sentences or at section breaks
-            if len(current_group) >= 2 or (sentence and sentence[-1] in '：？'):
-                final_paras.append('。'.join(current_group) + '。')
+            if len(current_group) >= 2 or sentence.endswith(_BREAK_SUFFIXES):
+                if group_clean:
+                    paras_append(raw_p[group_start:group_end]
+                                 + ('。' if group_needs_dot else ''))
+                else:
+                    paras_append('。'.join(current_group) + '。')
                 current_group = []
         
         # Add remaining sentences in this raw para
         if current_group:
-            final_paras.append('。'.join(current_group) + '。')
-            
-    # Wrap paragraphs in <p> tags
-    formatted_paragraphs = []
-    for para in final_paras:
-        para = para.strip()
-        if not para:
-            continue
+            if group_clean:
+                paras_append(raw_p[group_start:group_end]
+                             + ('。' if group_needs_dot else ''))
+            else:
+                paras_append('。'.join(current_group) + '。')
             
-        # Don't wrap if it's already HTML-like OR if it's a protected block
-        # Protected blocks (like tables) should stand alone
-        if para.startswith('<') or '__PROTECTED_BLOCK_' in para:
-            formatted_paragraphs.append(para)
-        else:
-            formatted_paragraphs.append(f'<p>{para}</p>')
-    
-    formatted = '\n\n'.join(formatted_paragraphs)
+    formatted = '\n\n'.join(out)
     
-    # Restore protected blocks
-    for i, block in enumerate(protected_blocks):
-        token = f'__PROTECTED_BLOCK_{i}__'
-        formatted = formatted.replace(token, block)
+    # Restore protected blocks in one pass; each per-block replace()
+    # rescanned the whole string.
+    if protected_blocks:
+        formatted = _TOKEN_RE.sub(
+            lambda m: protected_blocks[int(m.group(1))], formatted)
 
     # 4. Bold section headers (text ending with ：)
-    header_pattern = r'<p>([^<>]+：)</p>'
-    formatted = re.sub(
-        header_pattern,
-        r'<p><strong>\1</strong></p>',
-        formatted
-    )
+    if '：</p>' in formatted:
+        formatted = _HEADER_RE.sub(
+            r'<p><strong>\1</strong></p>',
+            formatted
+        )
     
     # 5. Detect and format "注释：" sections
     # Handle both standalone paragraphs and inline commentary
@@ -256,8 +354,8 @@ def format_content(content):
             commentary_content = parts[1].strip()
             
             # Remove any incomplete paragraph tags from commentary
-            commentary_content = re.sub(r'^</p>', '', commentary_content)
-            commentary_content = re.sub(r'<p>$', '', commentary_content)
+            commentary_content = _COMMENTARY_OPEN_RE.sub('', commentary_content)
+            commentary_content = _COMMENTARY_CLOSE_RE.sub('', commentary_content)
             
             # Clean up main content
             main_content = main_content.strip()
@@ -285,18 +383,35 @@ def preview_formatting(json_path, sample_indices):
     Returns:
         List of dicts with before/after content
     """
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+    # Stream the file and keep only the sampled entries, stopping at the
+    # last wanted index; the full list is never materialized when ijson
+    # is available.
+    sample_set = set(sample_indices)
+    last_wanted = max(sample_set) if sample_set else -1
+    found = {}
+    for idx, entry in enumerate(iter_entries(json_path)):
+        if idx > last_wanted:
+            break
+        if idx in sample_set:
+            found[idx] = entry
+    
+    # format_content is a pure string transform, so large samples can be
+    # formatted on all cores and zipped back in order; small ones are not
+    # worth the process spawn.
+    tasks = [(idx, found[idx]) for idx in sample_indices if idx in found]
+    contents = [entry['content'] for _, entry in tasks]
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(contents) >= 2 * workers:
+        chunksize = max(1, len(contents) // (workers * 4))
+        with Pool(workers) as pool:
+            formatted_list = list(pool.imap(format_content, contents,
+                                            chunksize))
+    else:
+        formatted_list = [format_content(content) for content in contents]
+
     previews = []
-    for idx in sample_indices:
-        if idx >= len(data):
-            continue
-        
-        entry = data[idx]
+    for (idx, entry), formatted in zip(tasks, formatted_list):
         original = entry['content']
-        formatted = format_content(original)
-        
         previews.append({
             'index': idx,
             'day_label': entry['day_label'],
@@ -324,8 +439,17 @@ def main():
     
     # Save preview to file
     preview_path = Path('content_formatting_preview.json')
-    with open(preview_path, 'w', encoding='utf-8') as f:
-        json.dump(previews, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        preview_path.write_bytes(
+            orjson.dumps(previews, option=orjson.OPT_INDENT_2))
+    elif '--pretty' in sys.argv:
+        # indent=2 forces the pure-Python encoder; only pay for it on request
+        with open(preview_path, 'w', encoding='utf-8') as f:
+            json.dump(previews, f, ensure_ascii=False, indent=2)
+    else:
+        with open(preview_path, 'w', encoding='utf-8') as f:
+            json.dump(previews, f, ensure_ascii=False,
+                      separators=(',', ':'))
     
     print(f"Generated preview for {len(previews)} entries")
     print(f"Saved to: {preview_path}")
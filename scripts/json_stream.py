@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Stream entries of a JSON array file with bounded memory.
+
+Entries are iterated one at a time via ijson when it is installed
+(falling back to a whole-file json.load), and rewrites go through a temp
+file that is atomically renamed over the original only when at least one
+entry actually changed.
+"""
+
+import json
+import os
+
+try:
+    # optional: ijson streams array items without materializing the file.
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    # optional: orjson's native encoder is several times faster than the
+    # stdlib's pure-Python indent-mode encoder.
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dump_json(path, data):
+    """Write data as indent-2 JSON, via orjson when it is installed."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _encode_entry(entry):
+    """Encode one entry as indent-2 JSON text, via orjson when installed.
+
+    orjson emits raw UTF-8 without escaping non-ASCII, matching the
+    stdlib's ensure_ascii=False output byte for byte.
+    """
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(entry, ensure_ascii=False, indent=2)
+
+
+def iter_entries(path):
+    """Yield entries of the JSON array at path one at a time."""
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item')
+    elif orjson is not None:
+        with open(path, 'rb') as f:
+            yield from orjson.loads(f.read())
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+
+def write_entries(path, entries):
+    """Stream an iterable of entries to path as an indent-2 JSON array.
+
+    Entries are encoded and written one at a time through a temp file
+    that atomically replaces path, so peak memory is bounded by one
+    entry regardless of how many the iterable produces.
+
+    Returns the number of entries written.
+    """
+    tmp_path = str(path) + '.tmp'
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write('[\n')
+        for entry in entries:
+            if count:
+                out.write(',\n')
+            dumped = _encode_entry(entry)
+            out.write('\n'.join('  ' + line for line in dumped.splitlines()))
+            count += 1
+        out.write('\n]')
+    os.replace(tmp_path, path)
+    return count
+
+
+def rewrite_entries(path, transform):
+    """Stream entries through transform(index, entry) and rewrite the file.
+
+    transform mutates the entry in place and returns True when it changed
+    it. The transformed array is written incrementally to a temp file that
+    replaces the original only when something changed; otherwise the temp
+    file is discarded and the original is left untouched.
+
+    Returns the number of changed entries.
+    """
+    tmp_path = str(path) + '.tmp'
+    changed = 0
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        out.write('[\n')
+        first = True
+        for i, entry in enumerate(iter_entries(path)):
+            if transform(i, entry):
+                changed += 1
+            if not first:
+                out.write(',\n')
+            dumped = _encode_entry(entry)
+            out.write('\n'.join('  ' + line for line in dumped.splitlines()))
+            first = False
+        out.write('\n]')
+    if changed:
+        os.replace(tmp_path, path)
+    else:
+        os.remove(tmp_path)
+    return changed
@@ -3,34 +3,45 @@
 Post-process formatted content to move commentary-box divs to the bottom.
 """
 
-import json
 import re
 from pathlib import Path
 
+from json_stream import rewrite_entries
+
+# Pattern to match the entire commentary-box div, compiled once at
+# import time. The capturing group makes split() return the boxes at
+# the odd indices, interleaved with the kept text.
+_COMMENTARY_RE = re.compile(r'(<div class="commentary-box">.*?</div>\s*)',
+                            re.DOTALL)
+
 
 def move_commentary_to_bottom(content):
     """Move <div class="commentary-box">...</div> to the end of content."""
-    # Pattern to match the entire commentary-box div
-    pattern = r'<div class="commentary-box">.*?</div>\s*'
-    
-    # Find all commentary boxes
-    matches = list(re.finditer(pattern, content, re.DOTALL))
-    
-    if not matches:
+    # One split separates the kept text from the boxes; the old
+    # per-box replace() re-copied the whole content for every box.
+    parts = _COMMENTARY_RE.split(content)
+
+    if len(parts) == 1:
         return content
+
+    kept = ''.join(parts[::2])
+    commentary_boxes = parts[1::2]
+
+    # Append the boxes at the end
+    return kept.rstrip() + '\n\n' + '\n\n'.join(commentary_boxes)
+
+
+def _move_entry(i, entry):
+    """Move one entry's commentary boxes; returns True when it changed."""
+    content = entry.get('content', '')
     
-    # Extract commentary boxes
-    commentary_boxes = [match.group(0) for match in matches]
-    
-    # Remove them from their current positions
-    result = content
-    for box in commentary_boxes:
-        result = result.replace(box, '', 1)
-    
-    # Append them at the end
-    result = result.rstrip() + '\n\n' + '\n\n'.join(commentary_boxes)
-    
-    return result
+    if 'commentary-box' in content:
+        new_content = move_commentary_to_bottom(content)
+        if new_content != content:
+            entry['content'] = new_content
+            print(f"✓ [{i+1}] {entry['day_label']}: Moved commentary to bottom")
+            return True
+    return False
 
 
 def main():
@@ -41,26 +52,11 @@ def main():
         print(f"Error: {json_path} not found")
         return
     
-    # Load data
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f"Processing {len(data)} entries...")
-    
-    moved_count = 0
-    for i, entry in enumerate(data):
-        content = entry.get('content', '')
-        
-        if 'commentary-box' in content:
-            new_content = move_commentary_to_bottom(content)
-            if new_content != content:
-                entry['content'] = new_content
-                moved_count += 1
-                print(f"✓ [{i+1}/{len(data)}] {entry['day_label']}: Moved commentary to bottom")
+    print("Processing bibleData.json...")
     
-    # Save
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Stream entries through the mover; the file is only rewritten (via
+    # temp file + atomic rename) when something actually moved.
+    moved_count = rewrite_entries(json_path, _move_entry)
     
     print(f"\nDone! Moved commentary in {moved_count} entries")
 
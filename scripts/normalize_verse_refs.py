@@ -6,10 +6,23 @@ Converts: 诗一零二 25 → 诗102:25
 Skips: （六 7-8） - ambiguous, needs context
 """
 
-import json
+import os
 import re
+from itertools import product
+from multiprocessing import Pool
 from pathlib import Path
 
+from json_stream import iter_entries, write_entries
+
+try:
+    # optional: google-re2 compiles alternation-heavy patterns (the
+    # ~66-book-name alternation here) to a DFA that skips positions with
+    # no possible match, with no backtracking; fall back to the stdlib
+    # engine.
+    import re2 as _re
+except ImportError:
+    _re = re
+
 # List of valid book abbreviations
 BOOK_NAMES = [
     '创', '出', '利', '民', '申', '书', '士', '得', '撒上', '撒下',
@@ -21,14 +34,60 @@ BOOK_NAMES = [
     '彼前', '彼后', '约一', '约二', '约三', '犹', '启'
 ]
 
-def chinese_to_arabic(chinese_num):
-    """Convert Chinese numbers to Arabic numerals."""
-    char_map = {
-        '零': '0', '一': '1', '二': '2', '三': '3', '四': '4',
-        '五': '5', '六': '6', '七': '7', '八': '8', '九': '9',
-        '十': '10', '廿': '20', '卅': '30'
-    }
-    
+# All patterns are compiled once at import time; the book-name
+# alternation in particular was being re-joined (and re-parsed by the
+# regex cache) for every entry. Alternatives are sorted longest-first
+# because re takes the first alternative that matches, not the longest:
+# in list order, 约 would swallow the 约一/约二/约三 epistles wherever
+# the shorter name alone completes a match (e.g. anchored scripture
+# lookups).
+_BOOK_ALT = '|'.join(map(re.escape,
+                         sorted(BOOK_NAMES, key=len, reverse=True)))
+# Single-chapter books take verse numbers directly: 犹14-15 → 犹1:14-15
+SINGLE_CHAPTER_BOOKS = ['俄', '门', '约二', '约三', '犹']
+# Both reference shapes fused into one alternation so every content
+# string is scanned once instead of twice: groups 1-4 are an optional
+# prefix + book name + chinese chapter + verse, groups 5-6 a
+# single-chapter book + verse.
+_REF_RE = _re.compile(
+    rf'([（(]?参)?({_BOOK_ALT})([一二三四五六七八九十零廿卅]+)\s*(\d+(?:-\d+)?)'
+    rf'|({"|".join(map(re.escape, SINGLE_CHAPTER_BOOKS))})(\d+(?:-\d+)?)')
+# Standalone chapter references like （一 10） or （九15）, including
+# continuations like （十二 2，十三 16，十五4-5）
+_STANDALONE_RE = _re.compile(
+    r'（([一二三四五六七八九十零廿卅\s，、]+?)'
+    r'(\d+(?:-\d+)?(?:[，、]\s*[一二三四五六七八九十零廿卅\s]*\d+(?:-\d+)?)*)）')
+# Leading book name of a scripture field, for context
+_SCRIPTURE_BOOK_RE = _re.compile(rf'^({_BOOK_ALT})')
+# Pieces of a multi-reference parenthetical
+_PART_SPLIT_RE = _re.compile(r'[，、]\s*')
+_PART_REF_RE = _re.compile(r'([一二三四五六七八九十零廿卅\s]*?)(\d+(?:-\d+)?)')
+
+# Every chapter-bearing reference needs one of these numerals, so a
+# C-level isdisjoint scan can skip the regex passes on entries without
+# any (the single-chapter branch needs its book name instead).
+_CHINESE_DIGIT_CHARS = frozenset('一二三四五六七八九十零廿卅')
+
+
+# Built once at module scope; the function used to rebuild this dict on
+# every call, i.e. once per regex match.
+_CHAR_MAP = {
+    '零': '0', '一': '1', '二': '2', '三': '3', '四': '4',
+    '五': '5', '六': '6', '七': '7', '八': '8', '九': '9',
+    '十': '10', '廿': '20', '卅': '30'
+}
+
+# The plain digits (multipliers excluded), for the digit-by-digit path:
+# issuperset checks membership in C and translate maps the whole string
+# in one C call.
+_SINGLE_DIGITS = frozenset('零一二三四五六七八九')
+_DIGIT_TRANS = str.maketrans('零一二三四五六七八九', '0123456789')
+
+
+def _convert_chapter(chinese_num):
+    """Parse one Chinese chapter number the slow, branchy way."""
+    char_map = _CHAR_MAP
+
     # Simple single character
     if chinese_num in char_map:
         return char_map[chinese_num]
@@ -60,153 +119,189 @@ def chinese_to_arabic(chinese_num):
         return str(result)
     
     # Handle digit-by-digit like 一零二 (102)
-    all_digits = all(c in char_map and len(char_map[c]) == 1 for c in chinese_num)
-    if all_digits:
-        return ''.join(char_map[c] for c in chinese_num)
-    
+    if _SINGLE_DIGITS.issuperset(chinese_num):
+        return chinese_num.translate(_DIGIT_TRANS)
+
     # Fallback
     return chinese_num
 
+
+# Chapter strings are 1-3 characters over a 13-character alphabet, so
+# the whole input space (~2.4k strings) is enumerated once at import and
+# every later conversion is a single dict lookup with zero branches.
+_CHAPTER_MAP = {
+    ''.join(combo): _convert_chapter(''.join(combo))
+    for n in (1, 2, 3)
+    for combo in product(_CHAR_MAP, repeat=n)
+}
+
+
+def chinese_to_arabic(chinese_num):
+    """Convert Chinese numbers to Arabic numerals."""
+    result = _CHAPTER_MAP.get(chinese_num)
+    if result is not None:
+        return result
+    # Longer than any real chapter number: parse it the slow way
+    return _convert_chapter(chinese_num)
+
+
 def normalize_verse_references(content):
     """Normalize verse references with explicit book names only."""
-    
-    # Build pattern with explicit book names only
-    book_pattern = '|'.join(BOOK_NAMES)
-    # Pattern: optional prefix + book name + chinese chapter + space + verse
-    pattern = rf'([（(]?参)?({book_pattern})([一二三四五六七八九十零廿卅]+)\s*(\d+(?:-\d+)?)'
-    
-    def replace_func(match):
-        prefix = match.group(1) or ''
-        book = match.group(2)
-        chinese_chapter = match.group(3)
-        verse = match.group(4)
-        
-        # Convert Chinese chapter to Arabic
-        arabic_chapter = chinese_to_arabic(chinese_chapter)
-        
-        # Build normalized reference
-        normalized_ref = f'{book}{arabic_chapter}:{verse}'
-        
-        return f'{prefix}{normalized_ref}'
-    
-    content = re.sub(pattern, replace_func, content)
-    
-    # Handle single-chapter books: 犹14-15 → 犹1:14-15
-    single_chapter_books = ['俄', '门', '约二', '约三', '犹']
-    single_chapter_pattern = '|'.join(single_chapter_books)
-    single_ref_pattern = rf'({single_chapter_pattern})(\d+(?:-\d+)?)'
-    
-    def add_chapter_one(match):
-        book = match.group(1)
-        verses = match.group(2)
-        return f'{book}1:{verses}'
-    
-    content = re.sub(single_ref_pattern, add_chapter_one, content)
-    
-    return content
+
+    # Fast path: nothing can match when the content carries no Chinese
+    # numeral and none of the single-chapter book names.
+    if (_CHINESE_DIGIT_CHARS.isdisjoint(content)
+            and not any(book in content for book in SINGLE_CHAPTER_BOOKS)):
+        return content
+
+    # One finditer pass emitting into a join buffer: no per-match Python
+    # callback through sub's machinery, and groups() is fetched once per
+    # match instead of one group(N) attribute call per capture. Names
+    # touched per match are bound locally so the loop does LOAD_FAST
+    # instead of global/attribute lookups.
+    out = []
+    out_append = out.append
+    to_arabic = chinese_to_arabic
+    last = 0
+    for m in _REF_RE.finditer(content):
+        groups = m.groups()
+        book = groups[1]
+        if book is not None:
+            prefix = groups[0] or ''
+            # Convert Chinese chapter to Arabic
+            replacement = f'{prefix}{book}{to_arabic(groups[2])}:{groups[3]}'
+        else:
+            # Single-chapter book branch: 犹14-15 → 犹1:14-15
+            replacement = f'{groups[4]}1:{groups[5]}'
+        out_append(content[last:m.start()])
+        out_append(replacement)
+        last = m.end()
+
+    if not out:
+        return content
+    out_append(content[last:])
+    return ''.join(out)
+
+def _normalize_entry(entry):
+    """Normalize one entry's content in place; returns True when changed."""
+    if not entry.get('content'):
+        return False
+
+    original = entry['content']
+
+    # Extract book from scripture field for context
+    scripture_book = None
+    if entry.get('scripture'):
+        match = _SCRIPTURE_BOOK_RE.match(entry['scripture'])
+        if match:
+            scripture_book = match.group(1)
+
+    # If we have scripture context, normalize standalone chapter
+    # references first. Cheap prefilters: every standalone match needs a
+    # full-width left parenthesis, and the pass cannot change anything
+    # without a Chinese numeral to convert.
+    if (scripture_book and '（' in original
+            and not _CHINESE_DIGIT_CHARS.isdisjoint(original)):
+        def replace_with_context(match):
+            chinese_parts = match.group(1)
+            verses_part = match.group(2)
+
+            # Split by commas to handle multiple references
+            full_text = chinese_parts + verses_part
+            parts = _PART_SPLIT_RE.split(full_text)
+
+            normalized_parts = []
+            for part in parts:
+                part = part.strip()
+                if not part:
+                    continue
+
+                # Try to match Chinese chapter + verse
+                ref_match = _PART_REF_RE.match(part)
+                if ref_match:
+                    chinese_chapter = ref_match.group(1).replace(' ', '').strip()
+                    verse = ref_match.group(2)
+
+                    if chinese_chapter:
+                        # Has chapter number
+                        arabic_chapter = chinese_to_arabic(chinese_chapter)
+                        normalized_parts.append(f'{scripture_book}{arabic_chapter}:{verse}')
+                    elif normalized_parts:
+                        # No chapter, just verse - use last chapter
+                        normalized_parts.append(verse)
+                    else:
+                        # First reference with no chapter - skip
+                        continue
+
+            if normalized_parts:
+                return f'（{"，".join(normalized_parts)}）'
+            return match.group(0)
+
+        original = _STANDALONE_RE.sub(replace_with_context, original)
+
+    # Then apply normal normalization
+    normalized = normalize_verse_references(original)
+
+    if original != normalized or entry['content'] != normalized:
+        entry['content'] = normalized
+        return True
+    return False
+
+
+def _normalize_entry_task(entry):
+    """Pool worker wrapper: returns (changed, entry) so the parent gets
+    the mutated entry back across the process boundary."""
+    return _normalize_entry(entry), entry
+
 
 def main():
     """Main function to normalize bibleData.json."""
     data_file = Path('bibleData.json')
-    
+
     if not data_file.exists():
         print(f'Error: {data_file} not found')
         return 1
-    
-    # Load data
-    print(f'Loading {data_file}...')
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    print(f'Processing {len(data)} entries...')
+
+    print(f'Processing {data_file}...')
     print('Only normalizing references with explicit book names')
-    
-    # Normalize each entry
-    normalized_count = 0
-    for i, entry in enumerate(data):
-        if 'content' in entry and entry['content']:
-            original = entry['content']
-            
-            # Extract book from scripture field for context
-            scripture_book = None
-            if 'scripture' in entry and entry['scripture']:
-                book_pattern = '|'.join(BOOK_NAMES)
-                match = re.match(rf'^({book_pattern})', entry['scripture'])
-                if match:
-                    scripture_book = match.group(1)
-            
-            # If we have scripture context, normalize standalone chapter references first
-            if scripture_book:
-                # Pattern for standalone chapter references like （一 10） or （九15）
-                # Also handles continuation references like （十二 2，十 三 16，十五4-5）
-                standalone_pattern = r'（([一二三四五六七八九十零廿卅\s，、]+?)(\d+(?:-\d+)?(?:[，、]\s*[一二三四五六七八九十零廿卅\s]*\d+(?:-\d+)?)*)）'
-                
-                def replace_with_context(match):
-                    chinese_parts = match.group(1)
-                    verses_part = match.group(2)
-                    
-                    # Split by commas to handle multiple references
-                    full_text = chinese_parts + verses_part
-                    parts = re.split(r'[，、]\s*', full_text)
-                    
-                    normalized_parts = []
-                    for part in parts:
-                        part = part.strip()
-                        if not part:
-                            continue
-                        
-                        # Try to match Chinese chapter + verse
-                        ref_match = re.match(r'([一二三四五六七八九十零廿卅\s]*?)(\d+(?:-\d+)?)', part)
-                        if ref_match:
-                            chinese_chapter = ref_match.group(1).replace(' ', '').strip()
-                            verse = ref_match.group(2)
-                            
-                            if chinese_chapter:
-                                # Has chapter number
-                                arabic_chapter = chinese_to_arabic(chinese_chapter)
-                                normalized_parts.append(f'{scripture_book}{arabic_chapter}:{verse}')
-                            elif normalized_parts:
-                                # No chapter, just verse - use last chapter
-                                normalized_parts.append(verse)
-                            else:
-                                # First reference with no chapter - skip
-                                continue
-                    
-                    if normalized_parts:
-                        return f'（{"，".join(normalized_parts)}）'
-                    return match.group(0)
-                
-                original = re.sub(standalone_pattern, replace_with_context, original)
-            
-            # Then apply normal normalization
-            normalized = normalize_verse_references(original)
-            
-            if original != normalized or entry['content'] != normalized:
-                entry['content'] = normalized
-                normalized_count += 1
-                
-                if normalized_count <= 3:  # Show first 3 examples
+
+    # Stream entries through the normalizer instead of loading the whole
+    # array: one entry is resident at a time and the output goes through
+    # a temp file that atomically replaces the original.
+    counts = {'normalized': 0}
+
+    def _consume(results):
+        for i, (changed, entry) in enumerate(results):
+            if changed:
+                counts['normalized'] += 1
+                if counts['normalized'] <= 3:  # Show first 3 examples
                     print(f'\nEntry {i} ({entry.get("day_label", "?")}):')
-                    # Find what changed
-                    for line_orig, line_norm in zip(entry['content'].split('\n'), normalized.split('\n')):
-                        if line_orig != line_norm:
-                            print(f'  Before: {line_orig[:80]}...')
-                            print(f'  After:  {line_norm[:80]}...')
-                            break
-    
-    print(f'\n✓ Normalized {normalized_count} entries')
-    
-    # Backup original
+            yield entry
+
+    # Entries are independent, so fan the normalization out across
+    # cores; imap keeps both ends of the pipeline streaming, with
+    # in-flight entries bounded by the chunk size. The compiled patterns
+    # live at module scope so forked workers inherit them.
+    new_file = data_file.with_suffix('.json.new')
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = pool.imap(_normalize_entry_task,
+                                iter_entries(data_file), chunksize=32)
+            total = write_entries(new_file, _consume(results))
+    else:
+        results = map(_normalize_entry_task, iter_entries(data_file))
+        total = write_entries(new_file, _consume(results))
+
+    # Keep the previous file as the backup and promote the new one, both
+    # as pure renames - the old shutil.copy backup re-read and re-wrote
+    # the whole file just to duplicate bytes already on disk.
     backup_file = data_file.with_suffix('.json.bak2')
-    print(f'Creating backup: {backup_file}')
-    import shutil
-    shutil.copy(data_file, backup_file)
-    
-    # Save normalized data
-    print(f'Saving normalized data to {data_file}')
-    with open(data_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
+    print(f'\nKeeping previous data as: {backup_file}')
+    os.replace(data_file, backup_file)
+    os.replace(new_file, data_file)
+
+    print(f'\n✓ Normalized {counts["normalized"]} of {total} entries')
     print('✓ Done!')
     return 0
 
@@ -1,6 +1,7 @@
 
-import json
-import re
+from collections import defaultdict
+
+from json_stream import iter_entries, write_entries
 
 # List of inspirational Sabbath messages (Cycling)
 SABBATH_MESSAGES = [
@@ -88,19 +89,28 @@ SABBATH_MESSAGES = [
     }
 ]
 
+# Each message's HTML is serialized once per week (52 copies across the
+# output file), and the triple-quoted literals carry 8 spaces of source
+# indentation on every line. Strip the indentation once at import so the
+# repeated copies don't bloat the JSON; rendering is unaffected since
+# HTML ignores the whitespace.
+for _msg in SABBATH_MESSAGES:
+    _msg['content'] = '\n'.join(
+        line.strip() for line in _msg['content'].strip().splitlines())
+
+
+# The 365 day labels never change; build them once instead of
+# formatting an f-string per day in the week loop.
+_DAY_LABELS = tuple(f"第 {i} / 365 天" for i in range(1, 366))
+
+
 def process_bible_data(json_path):
     print(f"Processing {json_path} with Sabbath messages...")
     
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # 1. Group by Week
-    weeks = {}
-    for entry in data:
-        w = entry['week']
-        if w not in weeks:
-            weeks[w] = []
-        weeks[w].append(entry)
+    # 1. Group by Week, streaming entries instead of loading the array
+    weeks = defaultdict(list)
+    for entry in iter_entries(json_path):
+        weeks[entry['week']].append(entry)
     
     new_data = []
     
@@ -110,18 +120,17 @@ def process_bible_data(json_path):
     global_day_count = 1
     
     for w in range(1, max_week + 1):
-        week_entries = weeks.get(w, [])
-        week_entries.sort(key=lambda x: x['day'])
-        
+        # Index the week's entries by day once: the per-day next(...)
+        # scans were O(n) each, 7 times per week, and forced two sorts.
+        by_day = {e['day']: e for e in weeks.get(w, [])}
+
         # Determine Sabbath Message for this week (Cycle through list)
         msg_index = (w - 1) % len(SABBATH_MESSAGES)
         sabbath_msg = SABBATH_MESSAGES[msg_index]
-        
+
         # Ensure Day 7 exists and update it
-        # First, filter out existing Day 7 if we are going to overwrite/ensure it matches our spec
-        # Actually, let's find it.
-        day7_entry = next((e for e in week_entries if e['day'] == 7), None)
-        
+        day7_entry = by_day.get(7)
+
         if not day7_entry:
             day7_entry = {
                 "week": w,
@@ -129,30 +138,28 @@ def process_bible_data(json_path):
                 "scripture": "",
                 "verse": ""
             }
-            week_entries.append(day7_entry)
-        
+            by_day[7] = day7_entry
+
         # FORCE Update Day 7 content
         day7_entry['title'] = sabbath_msg['title']
         day7_entry['content'] = sabbath_msg['content']
         # Maybe add a generic "Read your favorite chapter" Note if not implicit
-        
-        # Re-sort because we might have appended
-        week_entries.sort(key=lambda x: x['day'])
-        
-        # Add to new_data with updated labels
+
+        # Add to new_data with updated labels; iterating d in numeric
+        # order replaces the sorts by construction
         for d in range(1, 8):
-            current_entry = next((e for e in week_entries if e['day'] == d), None)
-            
+            current_entry = by_day.get(d)
+
             if current_entry:
                 # Update Label
-                current_entry['day_label'] = f"第 {global_day_count} / 365 天"
+                current_entry['day_label'] = _DAY_LABELS[global_day_count - 1]
                 new_data.append(current_entry)
                 global_day_count += 1
 
     print(f"Processed {len(new_data)} entries.")
-    
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(new_data, f, ensure_ascii=False, indent=2)
+
+    # Streamed write through a temp file + atomic rename
+    write_entries(json_path, new_data)
 
 if __name__ == "__main__":
     process_bible_data("bibleData.json")
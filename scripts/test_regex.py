@@ -1,12 +1,42 @@
-import re
-
 text = '「起初」即在还未有时间以先，神已存在\n\n<p>换句话说，尚未有宇宙与世界以先，在任何被造物还未 出现之前，神已经存在。2.它否决了泛神论者之立场'
 
+# Sentence-ending punctuation that a numbered item may follow
+_SENT_END = '。?？!！'
+
+
+def split_numbered(text):
+    """Insert a newline between sentence-ending punctuation and a
+    following "<digits>." item marker.
+
+    Plain single scan instead of the old re.sub over
+    ([。?？!！])\\s*(\\d+\\.) - for small texts run repeatedly, walking
+    the string once beats the regex engine's setup and backtracking.
+    """
+    out = []
+    last = 0
+    n = len(text)
+    for i, c in enumerate(text):
+        if c not in _SENT_END:
+            continue
+        # Peek past whitespace for a digit run followed by '.'
+        j = i + 1
+        while j < n and text[j].isspace():
+            j += 1
+        k = j
+        while k < n and text[k].isdigit():
+            k += 1
+        if k > j and k < n and text[k] == '.':
+            out.append(text[last:i + 1])
+            out.append('\n')
+            last = j
+    out.append(text[last:])
+    return ''.join(out)
+
+
 print("--- Original ---")
 print(repr(text))
 
-# Current Regex
-split_text = re.sub(r'([。?？!！])\s*(\d+\.)', r'\1\n\2', text)
+split_text = split_numbered(text)
 print("\n--- Split Result ---")
 print(repr(split_text))
 